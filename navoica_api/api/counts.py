@@ -0,0 +1,105 @@
+"""
+Cache of counts of paginated querysets used by the navoica pagination classes.
+
+Counts are cached for a short time per view and filter signature, which is the SQL
+of the queryset without ordering. The signature contains the generation of models
+of the queryset, changed on every write of the model, so writes invalidate counts
+without deleting cache keys. Listings limited to some courses depend only on the
+generations of these courses, so writes in one course keep counts of other courses.
+Unfiltered listings can use the row estimate kept by the database instead of the
+exact count.
+"""
+import hashlib
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, router
+
+COUNT_CACHE_TIMEOUT = getattr(settings, 'NAVOICA_PAGINATION_COUNT_CACHE_TIMEOUT', 60)
+COUNT_CACHE_PREFIX = 'navoica_api.counts'
+
+
+def _generation_cache_key(model, course_id=None):
+    cache_key = u"{}.generation.{}".format(COUNT_CACHE_PREFIX, model._meta.label_lower)
+    if course_id is not None:
+        cache_key = u"{}.{}".format(cache_key, course_id)
+    return cache_key
+
+
+def invalidate_cached_counts(model, course_id=None):
+    """
+    Invalidate cached counts of querysets of the model.
+
+    With course_id only counts of listings of all courses and of listings limited
+    to courses including this one are invalidated.
+    """
+    generation = uuid4().hex
+    generation_keys = [_generation_cache_key(model)]
+    if course_id is not None:
+        generation_keys.append(_generation_cache_key(model, course_id))
+    cache.set_many({key: generation for key in generation_keys}, None)
+
+
+def _count_cache_key(queryset, name, models, course_ids=None):
+    sql, params = queryset.order_by().query.sql_with_params()
+    if course_ids is None:
+        generation_keys = [_generation_cache_key(model) for model in models]
+    else:
+        generation_keys = [
+            _generation_cache_key(model, course_id) for model in models for course_id in sorted(map(str, course_ids))
+        ]
+    generations = cache.get_many(generation_keys)
+    signature = repr((sql, params, [generations.get(key, '') for key in generation_keys]))
+    return u"{}.{}.{}".format(COUNT_CACHE_PREFIX, name, hashlib.sha1(signature.encode('utf-8')).hexdigest())
+
+
+def cached_count(queryset, name, models=None, course_ids=None):
+    """
+    Return the exact count of the queryset, cached for COUNT_CACHE_TIMEOUT seconds.
+
+    Arguments:
+        queryset: filtered queryset
+        name: name of the view or listing, part of the cache key
+        models: models whose writes invalidate the count, model of the queryset by default
+        course_ids: courses the queryset is limited to, writes in other courses
+            don't invalidate the count; None when the queryset spans all courses
+    """
+    try:
+        cache_key = _count_cache_key(queryset, name, models or [queryset.model], course_ids)
+    except EmptyResultSet:
+        return 0
+    count = cache.get(cache_key)
+    if count is None:
+        count = queryset.count()
+        cache.set(cache_key, count, COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def is_unfiltered(queryset):
+    query = queryset.query
+    return not query.where and not query.distinct and query.low_mark == 0 and query.high_mark is None
+
+
+def estimated_count(model):
+    """
+    Return the number of rows of the model table estimated by the database or None.
+
+    Estimates are read from table statistics of MySQL and PostgreSQL, so they cost
+    the same for every table size, but can differ from the exact count.
+    """
+    connection = connections[router.db_for_read(model)]
+    if connection.vendor == 'mysql':
+        sql = ("SELECT TABLE_ROWS FROM information_schema.TABLES "
+               "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s")
+    elif connection.vendor == 'postgresql':
+        sql = "SELECT reltuples FROM pg_class WHERE relname = %s"
+    else:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [model._meta.db_table])
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
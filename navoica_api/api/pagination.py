@@ -0,0 +1,206 @@
+"""
+Pagination classes for the API.
+"""
+import base64
+import binascii
+import json
+from functools import partial
+
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db.models import Q
+from edx_rest_framework_extensions.paginators import DefaultPagination
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from navoica_api.api.counts import cached_count, estimated_count, is_unfiltered
+
+
+def get_count_name(view):
+    if view is None:
+        return 'listing'
+    return view.__class__.__name__
+
+
+def get_count_models(view):
+    return getattr(view, 'count_cache_models', None)
+
+
+def get_count_course_ids(view):
+    return getattr(view, 'count_cache_course_ids', None)
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination ordered by the ``ordering`` fields, the last one must be unique.
+
+    The cursor keeps values of the ordering fields of the first/last item of the page,
+    so every page costs the same as the first one. The total count is returned only
+    when the client asks for it with ``count=true``.
+    """
+    ordering = ('id',)
+    page_size = 10
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def encode_cursor(self, values, reverse):
+        data = json.dumps({'v': [str(value) for value in values], 'r': reverse})
+        return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, queryset, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            values = [
+                queryset.model._meta.get_field(field).to_python(value)
+                for field, value in zip(self.ordering, data['v'])
+            ]
+            reverse = bool(data['r'])
+        except (TypeError, ValueError, KeyError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
+
+    def keyset_filter(self, values, reverse):
+        """
+        Return Q object selecting items after (or before when reverse) given ordering values.
+        """
+        lookup = 'lt' if reverse else 'gt'
+        condition = Q()
+        for index, field in enumerate(self.ordering):
+            equal_fields = {name: value for name, value in zip(self.ordering[:index], values[:index])}
+            condition |= Q(**equal_fields) & Q(**{'{}__{}'.format(field, lookup): values[index]})
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        values, reverse = self.decode_cursor(queryset, request)
+
+        self.count = None
+        if request.query_params.get(self.count_query_param) == 'true':
+            self.count = cached_count(queryset, get_count_name(view), get_count_models(view),
+                                      get_count_course_ids(view))
+
+        ordering = ['-' + field if reverse else field for field in self.ordering]
+        page_queryset = queryset.order_by(*ordering)
+        if values is not None:
+            page_queryset = page_queryset.filter(self.keyset_filter(values, reverse))
+
+        page = list(page_queryset[:self.page_size + 1])
+        has_more = len(page) > self.page_size
+        page = page[:self.page_size]
+        if reverse:
+            page.reverse()
+
+        self.page = page
+        self.has_next = has_more if not reverse else values is not None
+        self.has_previous = values is not None if not reverse else has_more
+        return page
+
+    def _item_values(self, item):
+        return [getattr(item, field) for field in self.ordering]
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param,
+                                   self.encode_cursor(self._item_values(self.page[-1]), reverse=False))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param,
+                                   self.encode_cursor(self._item_values(self.page[0]), reverse=True))
+
+    def get_paginated_response(self, data):
+        response_dict = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.count is not None:
+            response_dict['count'] = self.count
+        return Response(response_dict)
+
+
+class CountedPaginator(Paginator):
+    """
+    Django paginator with the count computed in advance.
+    """
+
+    def __init__(self, object_list, per_page, count=None, **kwargs):
+        super(CountedPaginator, self).__init__(object_list, per_page, **kwargs)
+        if count is not None:
+            self.__dict__['count'] = count
+
+
+class CachedCountPagination(DefaultPagination):
+    """
+    Page number pagination with counts cached per view and filter signature.
+
+    With ``count=estimated`` unfiltered listings use the number of rows estimated by
+    the database, the response has then ``count_estimated`` set to true.
+    """
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        count = None
+        if request.query_params.get(self.count_query_param) == 'estimated' and is_unfiltered(queryset):
+            count = estimated_count(queryset.model)
+        self.count_estimated = count is not None
+        if count is None:
+            count = cached_count(queryset, get_count_name(view), get_count_models(view),
+                                 get_count_course_ids(view))
+        self.django_paginator_class = partial(CountedPaginator, count=count)
+        return super(CachedCountPagination, self).paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        response = super(CachedCountPagination, self).get_paginated_response(data)
+        if self.count_estimated:
+            response.data['count_estimated'] = True
+        return response
+
+
+class CertificateKeysetPagination(KeysetPagination):
+    ordering = ('created_date', 'id')
+
+
+class CourseOpinionKeysetPagination(KeysetPagination):
+    ordering = ('created', 'id')
+
+
+class KeysetPaginationMixin(object):
+    """
+    Use ``keyset_pagination_class`` instead of ``pagination_class`` when the client asks for it
+    with ``pagination=cursor`` query parameter.
+    """
+    keyset_pagination_class = None
+    pagination_mode_query_param = 'pagination'
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if (self.keyset_pagination_class is not None and
+                    self.request.query_params.get(self.pagination_mode_query_param) == 'cursor'):
+                self._paginator = self.keyset_pagination_class()
+            else:
+                return super(KeysetPaginationMixin, self).paginator
+        return self._paginator
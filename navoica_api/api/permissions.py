@@ -5,9 +5,24 @@ from __future__ import absolute_import, unicode_literals
 
 from common.djangoapps.student.roles import (  # pylint: disable=import-error
     CourseInstructorRole, CourseStaffRole)
+from opaque_keys.edx.keys import CourseKey
 from openedx.core.lib.api.permissions import IsUserInUrlOrStaff
 from rest_framework import permissions
 
+from navoica_api.roles.cache import has_course_role
+
+
+def _course_key(obj):
+    """
+    Return course key of the object passed to check_object_permissions.
+
+    The object can be a CourseKey, so views do not have to load the course
+    from the modulestore, or any course-like object with id (e.g. CourseOverview).
+    """
+    if isinstance(obj, CourseKey):
+        return obj
+    return getattr(obj, 'id', None)
+
 
 class IsCourseStaffInstructorOrUserInUrlOrStaff(IsUserInUrlOrStaff):
     """
@@ -17,9 +32,8 @@ class IsCourseStaffInstructorOrUserInUrlOrStaff(IsUserInUrlOrStaff):
     def has_object_permission(self, request, view, obj):
         if (hasattr(request, 'user') and
                 # either the user is a staff or instructor of the master course
-                (hasattr(obj, 'id') and
-                 (CourseInstructorRole(obj.id).has_user(request.user) or
-                  CourseStaffRole(obj.id).has_user(request.user))) or
+                (_course_key(obj) is not None and
+                 has_course_role(request.user, _course_key(obj), CourseInstructorRole.ROLE, CourseStaffRole.ROLE)) or
                 # or it is a safe method and the user is a coach on the course object
                 (request.method in permissions.SAFE_METHODS
                  and hasattr(obj, 'coach') and obj.coach == request.user)):
@@ -40,9 +54,8 @@ class IsCourseStaffInstructorOrStaff(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if (hasattr(request, 'user') and
                 # either the user is a staff or instructor of the master course
-                (hasattr(obj, 'id') and
-                 (CourseInstructorRole(obj.id).has_user(request.user) or
-                  CourseStaffRole(obj.id).has_user(request.user))) or
+                (_course_key(obj) is not None and
+                 has_course_role(request.user, _course_key(obj), CourseInstructorRole.ROLE, CourseStaffRole.ROLE)) or
                 # or it is a safe method and the user is a coach on the course object
                 (request.method in permissions.SAFE_METHODS
                  and hasattr(obj, 'coach') and obj.coach == request.user)) or request.user.is_staff:
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from lms.djangoapps.certificates.models import GeneratedCertificate
+
+from navoica_api.api.counts import invalidate_cached_counts
+from navoica_api.models import CertificateRosterEntry, CourseRunOpinionModel
+
+# fields whose updates don't change which rows are listed
+COUNT_IRRELEVANT_FIELDS = {
+    GeneratedCertificate: frozenset(['download_url', 'download_uuid', 'verify_uuid', 'error_reason', 'modified_date']),
+    CourseRunOpinionModel: frozenset(['content', 'grade', 'last_updated']),
+}
+
+
+@receiver(post_save, sender=GeneratedCertificate, dispatch_uid="navoica_api_counts_certificate_saved")
+@receiver(post_delete, sender=GeneratedCertificate, dispatch_uid="navoica_api_counts_certificate_deleted")
+@receiver(post_save, sender=CertificateRosterEntry, dispatch_uid="navoica_api_counts_roster_saved")
+@receiver(post_delete, sender=CertificateRosterEntry, dispatch_uid="navoica_api_counts_roster_deleted")
+@receiver(post_save, sender=CourseRunOpinionModel, dispatch_uid="navoica_api_counts_opinion_saved")
+@receiver(post_delete, sender=CourseRunOpinionModel, dispatch_uid="navoica_api_counts_opinion_deleted")
+def invalidate_counts(sender, instance, update_fields=None, **kwargs):
+    if update_fields and frozenset(update_fields) <= COUNT_IRRELEVANT_FIELDS.get(sender, frozenset()):
+        return
+    invalidate_cached_counts(sender, getattr(instance, 'course_id', None))
@@ -1 +1,42 @@
 # """ Tests for API permissions classes. """
+from common.djangoapps.student.roles import CourseInstructorRole, CourseStaffRole
+from django.test import TestCase
+from lms.djangoapps.courseware.tests.factories import UserFactory
+from opaque_keys.edx.keys import CourseKey
+
+from navoica_api.roles.cache import get_user_course_roles, has_course_role
+
+
+class CourseRolesCacheTest(TestCase):
+    """
+    Test for the course roles used by the permission classes
+    """
+
+    def setUp(self):
+        super(CourseRolesCacheTest, self).setUp()
+        self.user = UserFactory()
+        self.course_key = CourseKey.from_string('course-v1:edX+DemoX+Demo_Course')
+        self.other_course_key = CourseKey.from_string('course-v1:edX+DemoX+Other_Course')
+
+    def test_roles_are_fetched_with_one_query(self):
+        CourseStaffRole(self.course_key).add_users(self.user)
+        CourseInstructorRole(self.other_course_key).add_users(self.user)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(has_course_role(self.user, self.course_key, CourseStaffRole.ROLE))
+            self.assertTrue(has_course_role(self.user, self.other_course_key, CourseInstructorRole.ROLE))
+            self.assertFalse(has_course_role(self.user, self.course_key, CourseInstructorRole.ROLE))
+
+    def test_roles_are_invalidated_on_change(self):
+        self.assertFalse(has_course_role(self.user, self.course_key, CourseStaffRole.ROLE))
+
+        CourseStaffRole(self.course_key).add_users(self.user)
+        self.assertTrue(has_course_role(self.user, self.course_key, CourseStaffRole.ROLE))
+
+        CourseStaffRole(self.course_key).remove_users(self.user)
+        self.assertFalse(has_course_role(self.user, self.course_key, CourseStaffRole.ROLE))
+
+    def test_inactive_user_has_no_roles(self):
+        CourseStaffRole(self.course_key).add_users(self.user)
+        self.user.is_active = False
+        self.assertEqual(get_user_course_roles(self.user), frozenset())
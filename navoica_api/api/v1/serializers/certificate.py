@@ -5,6 +5,8 @@ from rest_framework import serializers
 
 from lms.djangoapps.certificates.models import GeneratedCertificate
 
+from navoica_api.models import CertificateRosterEntry
+
 
 class GeneratedCertificateSerializer(serializers.ModelSerializer):
     profile_name = serializers.CharField(read_only=True, source='user.profile.name')
@@ -13,3 +15,9 @@ class GeneratedCertificateSerializer(serializers.ModelSerializer):
     class Meta:
         model = GeneratedCertificate
         fields = ['profile_name', 'username', 'email', 'created_date', 'grade']
+
+
+class CertificateRosterEntrySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CertificateRosterEntry
+        fields = ['profile_name', 'username', 'email', 'created_date', 'grade']
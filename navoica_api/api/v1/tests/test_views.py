@@ -1,18 +1,28 @@
 """
 Tests for the Certificate REST APIs.
 """
+import gzip
+import json
 from collections import OrderedDict
 from datetime import datetime, timedelta
+from unittest import mock
 from django.utils.http import urlencode
 from common.djangoapps.student.tests.factories import CourseEnrollmentFactory
+from completion.models import BlockCompletion
+from django.core.cache import cache
 from django.urls import reverse
 from django.utils import timezone
 from freezegun import freeze_time
-from lms.djangoapps.certificates.models import CertificateStatuses
+from lms.djangoapps.certificates.models import CertificateStatuses, GeneratedCertificate
 from lms.djangoapps.certificates.tests.factories import \
     GeneratedCertificateFactory
 from lms.djangoapps.courseware.tests.factories import (InstructorFactory,
                                                        UserFactory)
+from navoica_api.api.counts import _generation_cache_key, invalidate_cached_counts
+from navoica_api.certificates.roster import backfill_course_roster
+from navoica_api.models import CertificateRosterExport, CourseProgressModel
+from navoica_api.progress.cache import get_course_structure_index, invalidate_course_structure_index
+from navoica_api.progress.materialized import get_course_progress_model, reconcile_course_progress
 from oauth2_provider import models as dot_models
 from openedx.features.course_experience.views.course_updates import \
     STATUS_VISIBLE
@@ -20,7 +30,7 @@ from rest_framework import status
 from rest_framework.test import APITestCase
 from six import text_type
 from xmodule.modulestore.tests.django_utils import SharedModuleStoreTestCase
-from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory, check_mongo_calls
 
 USER_PASSWORD = 'test'
 
@@ -96,6 +106,11 @@ class CourseProgressApiViewTest(SharedModuleStoreTestCase, APITestCase):
 
         super(CourseProgressApiViewTest, self).setUp()
 
+        # progress is updated after commit of the completion, test transactions are never committed
+        on_commit_patcher = mock.patch('django.db.transaction.on_commit', lambda func: func())
+        on_commit_patcher.start()
+        self.addCleanup(on_commit_patcher.stop)
+
         self.student = UserFactory(password=USER_PASSWORD)
         self.instructor_user = InstructorFactory(course_key=self.course.id, password=USER_PASSWORD)
         self.staff_user = UserFactory(password=USER_PASSWORD, is_staff=True)
@@ -227,6 +242,277 @@ class CourseProgressApiViewTest(SharedModuleStoreTestCase, APITestCase):
         resp = self.client.get(self.get_url(self.student.username, self.course.id))
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
 
+    def test_completion_value(self):
+        """
+        Test that completed xblocks are counted in the progress of the unit
+        """
+        BlockCompletion.objects.submit_completion(
+            user=self.student,
+            block_key=self.problem.location,
+            completion=1.0,
+        )
+        self.client.login(username=self.student.username, password=USER_PASSWORD)
+        resp = self.client.get(self.get_url(self.student.username, self.course.id))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['completion_value'], 1.0)
+
+        # completions from another course are not counted
+        resp = self.client.get(self.get_url(self.student.username, self.second_course.id))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['completion_value'], 0.0)
+        self.client.logout()
+
+    def test_completion_updates_stored_progress(self):
+        """
+        Test that the submitted completion updates stored progress and reconcile repairs drifted rows
+        """
+        get_course_progress_model(self.student.id, self.course.id)
+        BlockCompletion.objects.submit_completion(
+            user=self.student,
+            block_key=self.problem.location,
+            completion=1.0,
+        )
+        course_progress = CourseProgressModel.objects.get(user=self.student, course_id=self.course.id)
+        self.assertEqual(course_progress.completion_value, 1.0)
+
+        CourseProgressModel.objects.filter(pk=course_progress.pk).update(completion_value=0.2, unit_sums='[0.0]')
+        self.assertEqual(reconcile_course_progress(self.course.id), (0, 1))
+        self.assertEqual(CourseProgressModel.objects.get(pk=course_progress.pk).completion_value, 1.0)
+
+    def test_learner_courses_progress(self):
+        """
+        Test that the learner gets progress of all active enrollments in one request
+        """
+        BlockCompletion.objects.submit_completion(
+            user=self.student,
+            block_key=self.problem.location,
+            completion=1.0,
+        )
+        url = reverse('navoica_api:v1:progress:courses', kwargs={'username': self.student.username})
+
+        self.client.login(username=self.student.username, password=USER_PASSWORD)
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data, {u"username": self.student.username,
+                                     u"courses": {text_type(self.course.id): 1.0}})
+
+        resp = self.client.get(url, {'course_id': [text_type(self.course.id), text_type(self.second_course.id)]})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data, {u"username": self.student.username,
+                                     u"courses": {text_type(self.course.id): 1.0,
+                                                  text_type(self.second_course.id): 0.0}})
+
+        resp = self.client.get(url, {'course_id': 'invalid'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # authorized student for different user - should be 403
+        resp = self.client.get(reverse('navoica_api:v1:progress:courses',
+                                       kwargs={'username': self.instructor_user.username}))
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+        self.client.logout()
+
+    def test_repeated_request_does_not_touch_modulestore(self):
+        """
+        Test that the course is not loaded from the modulestore once its overview and structure are cached
+        """
+        self.client.login(username=self.student.username, password=USER_PASSWORD)
+        resp = self.client.get(self.get_url(self.student.username, self.course.id))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        with check_mongo_calls(0):
+            resp = self.client.get(self.get_url(self.student.username, self.course.id))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.client.logout()
+
+    def test_structure_index_does_not_depend_on_requesting_user(self):
+        """
+        Test that staff and learner requests resolve to the same structure index without staff only units
+        """
+        course = CourseFactory.create(org='edx', number='hidden', display_name='Course with hidden unit')
+        chapter = ItemFactory.create(parent_location=course.location, category='chapter')
+        sequential = ItemFactory.create(parent_location=chapter.location, category='sequential')
+        vertical = ItemFactory.create(parent_location=sequential.location, category='vertical')
+        problem = ItemFactory.create(parent=vertical, category='problem')
+        hidden_vertical = ItemFactory.create(parent_location=sequential.location, category='vertical',
+                                             visible_to_staff_only=True)
+        ItemFactory.create(parent=hidden_vertical, category='problem')
+        CourseEnrollmentFactory.create(user=self.student, course_id=course.id)
+        BlockCompletion.objects.submit_completion(user=self.student, block_key=problem.location, completion=1.0)
+
+        self.client.login(username=self.student.username, password=USER_PASSWORD)
+        resp = self.client.get(self.get_url(self.student.username, course.id))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['completion_value'], 1.0)
+        learner_unit_ids = list(get_course_structure_index(course.id).unit_ids)
+        self.client.logout()
+
+        cache.clear()
+        invalidate_course_structure_index(course.id)
+
+        self.client.login(username=self.staff_user.username, password=USER_PASSWORD)
+        resp = self.client.get(self.get_url(self.student.username, course.id))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['completion_value'], 1.0)
+        self.assertEqual(list(get_course_structure_index(course.id).unit_ids), learner_unit_ids)
+        self.assertEqual(learner_unit_ids, [text_type(vertical.location)])
+        self.client.logout()
+
+    def test_course_progress_changes(self):
+        """
+        Test that only units changed since given time are returned and unchanged progress returns 304
+        """
+        url = reverse('navoica_api:v1:progress:changes', kwargs={'username': self.student.username,
+                                                                 'course_id': self.course.id})
+        self.client.login(username=self.student.username, password=USER_PASSWORD)
+        resp = self.client.get(url, {'since': self.now.isoformat()})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['units'], [])
+        etag = resp['ETag']
+
+        resp = self.client.get(url, {'since': self.now.isoformat()}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with freeze_time(self.now + timedelta(minutes=1)):
+            BlockCompletion.objects.submit_completion(
+                user=self.student,
+                block_key=self.problem.location,
+                completion=1.0,
+            )
+        resp = self.client.get(url, {'since': self.now.isoformat()}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['completion_value'], 1.0)
+        self.assertEqual(resp.data['units'], [{"id": text_type(self.vertical.location), "completion_value": 1.0}])
+
+        etag = resp['ETag']
+        BlockCompletion.objects.filter(user=self.student, context_key=self.course.id).delete()
+        resp = self.client.get(url, {'since': self.now.isoformat()}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['completion_value'], 0.0)
+
+        resp = self.client.get(url, {'since': 'yesterday'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.logout()
+
+    def test_course_progress_changes_before_stored_progress_is_updated(self):
+        """
+        Test that changes are returned from the completions when the task updating stored progress did not run yet
+        """
+        url = reverse('navoica_api:v1:progress:changes', kwargs={'username': self.student.username,
+                                                                 'course_id': self.course.id})
+        self.assertEqual(get_course_progress_model(self.student.id, self.course.id).completion_value, 0.0)
+
+        with mock.patch('navoica_api.progress.signals.handlers.update_learner_unit_progress') as update_task:
+            BlockCompletion.objects.submit_completion(
+                user=self.student,
+                block_key=self.problem.location,
+                completion=1.0,
+            )
+        update_task.delay.assert_called_once()
+        self.assertEqual(CourseProgressModel.objects.get(user=self.student, course_id=self.course.id)
+                         .completion_value, 0.0)
+
+        self.client.login(username=self.student.username, password=USER_PASSWORD)
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['completion_value'], 1.0)
+        self.assertEqual(resp.data['units'], [{"id": text_type(self.vertical.location), "completion_value": 1.0}])
+        self.client.logout()
+
+    def test_course_progress_list(self):
+        """
+        Test that the course staff gets streamed progress of all enrolled learners
+        """
+        BlockCompletion.objects.submit_completion(
+            user=self.student,
+            block_key=self.problem.location,
+            completion=1.0,
+        )
+        url = reverse('navoica_api:v1:progress:list', kwargs={'course_id': self.course.id})
+
+        # student - should be 403
+        self.client.login(username=self.student.username, password=USER_PASSWORD)
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+        self.client.logout()
+
+        self.client.login(username=self.instructor_user.username, password=USER_PASSWORD)
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        lines = b''.join(resp.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual([json.loads(line) for line in lines], [{u"username": self.student.username,
+                                                                 u"course_id": text_type(self.course.id),
+                                                                 u"completion_value": 1.0}])
+
+        resp = self.client.get(url, {'output_format': 'csv'})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        lines = b''.join(resp.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(lines, ['username,course_id,completion_value',
+                                 '{},{},1.0'.format(self.student.username, self.course.id)])
+
+        resp = self.client.get(url, {'output_format': 'xml'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.logout()
+
+    def test_course_progress_distribution(self):
+        """
+        Test that the course staff gets distribution of progress of enrolled learners
+        """
+        BlockCompletion.objects.submit_completion(
+            user=self.student,
+            block_key=self.problem.location,
+            completion=1.0,
+        )
+        url = reverse('navoica_api:v1:progress:distribution', kwargs={'course_id': self.course.id})
+
+        self.client.login(username=self.student.username, password=USER_PASSWORD)
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+        self.client.logout()
+
+        self.client.login(username=self.staff_user.username, password=USER_PASSWORD)
+        resp = self.client.get(url, {'bins': 2})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['learners'], 1)
+        self.assertEqual(resp.data['mean'], 1.0)
+        self.assertEqual(resp.data['histogram'], {'bins': [0.0, 0.5, 1.0], 'counts': [0, 1]})
+
+        resp = self.client.get(url, {'bins': 'many'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.logout()
+
+    def test_course_progress_heatmap(self):
+        """
+        Test that the course staff gets share of enrolled learners who completed units and xblocks
+        """
+        CourseEnrollmentFactory.create(user=UserFactory(), course_id=self.course.id)
+        BlockCompletion.objects.submit_completion(
+            user=self.student,
+            block_key=self.problem.location,
+            completion=1.0,
+        )
+        # completion of the user who is not enrolled in the course is not counted
+        BlockCompletion.objects.submit_completion(
+            user=self.instructor_user,
+            block_key=self.problem.location,
+            completion=1.0,
+        )
+        url = reverse('navoica_api:v1:progress:heatmap', kwargs={'course_id': self.course.id})
+
+        self.client.login(username=self.instructor_user.username, password=USER_PASSWORD)
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['learners'], 2)
+        self.assertEqual(resp.data['units'], [{
+            "id": text_type(self.vertical.location),
+            "completion_share": 0.5,
+            "blocks": [{
+                "id": text_type(self.problem.location),
+                "completed": 1,
+                "completion_share": 0.5,
+            }],
+        }])
+        self.client.logout()
+
     def test_course_does_not_exist(self):
         """
         Verify that the course exists
@@ -446,6 +732,193 @@ class CertificatesListViewTest(SharedModuleStoreTestCase, APITestCase):
         self.assertEqual(resp.data, {u'detail': u'You do not have permission to perform this action.'})
         self.client.logout()
 
+    def test_csv_attachment(self):
+        """
+        Test that the certificates are streamed as CSV file, optionally compressed
+        """
+        self.client.login(username=self.instructor.username, password=USER_PASSWORD)
+        resp = self.client.get(self.get_url(self.course.id), {'attachment': ''})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertIn('attachment; filename=report_', resp['Content-Disposition'])
+        content = b''.join(resp.streaming_content)
+        lines = content.decode('utf-8').splitlines()
+        self.assertEqual(lines[0], 'profile_name,username,email,created_date,grade')
+        self.assertIn(self.student.username, lines[1])
+
+        resp = self.client.get(self.get_url(self.course.id), {'attachment': '', 'gzip': ''})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp['Content-Type'], 'application/gzip')
+        self.assertEqual(gzip.decompress(b''.join(resp.streaming_content)), content)
+        self.client.logout()
+
+    @mock.patch('navoica_api.api.v1.views.CSV_EXPORT_CHUNK_SIZE', 1)
+    def test_csv_attachment_in_chunks(self):
+        """
+        Test that all certificates are streamed in the requested ordering when they are fetched in many chunks
+        """
+        other_student = UserFactory(username='zz-learner', password=USER_PASSWORD)
+        CourseEnrollmentFactory.create(user=other_student, course_id=self.course.id)
+        GeneratedCertificateFactory(
+            user=other_student,
+            course_id=self.course.id,
+            download_url=self.DOWNLOAD_URL,
+            status=CertificateStatuses.downloadable,
+            created_date=self.CREATED_DATE,
+            grade=0.5,
+        )
+
+        self.client.login(username=self.instructor.username, password=USER_PASSWORD)
+        resp = self.client.get(self.get_url(self.course.id), {'attachment': ''})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        lines = b''.join(resp.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn(self.student.username, lines[1])
+        self.assertIn(other_student.username, lines[2])
+
+        resp = self.client.get(self.get_url(self.course.id), {'attachment': '', 'ordering': '-user__username'})
+        lines = b''.join(resp.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn(other_student.username, lines[1])
+        self.assertIn(self.student.username, lines[2])
+        self.client.logout()
+
+    def test_count_generations_of_courses(self):
+        """
+        Test that writes invalidate counts of their course only and updates of download url are ignored
+        """
+        course_generation_key = _generation_cache_key(GeneratedCertificate, self.course.id)
+        second_course_generation_key = _generation_cache_key(GeneratedCertificate, self.second_course.id)
+        invalidate_cached_counts(GeneratedCertificate, self.course.id)
+        generation = cache.get(course_generation_key)
+
+        self.certificate.download_url = "http://www.example.com/other.pdf"
+        self.certificate.save(update_fields=['download_url'])
+        self.assertEqual(cache.get(course_generation_key), generation)
+
+        second_course_generation = cache.get(second_course_generation_key)
+        self.second_certificate.status = CertificateStatuses.notpassing
+        self.second_certificate.save()
+        self.assertEqual(cache.get(course_generation_key), generation)
+        self.assertNotEqual(cache.get(second_course_generation_key), second_course_generation)
+
+        self.certificate.status = CertificateStatuses.notpassing
+        self.certificate.save()
+        self.assertNotEqual(cache.get(course_generation_key), generation)
+
+    def test_export_permissions_and_format(self):
+        """
+        Test that only the course staff can start the export in a supported format
+        """
+        url = reverse('navoica_api:v1:certificates:exports', kwargs={'course_id': self.course.id})
+
+        self.client.login(username=self.student.username, password=USER_PASSWORD)
+        resp = self.client.post(url, {'output_format': 'csv'})
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+        self.client.logout()
+
+        self.client.login(username=self.instructor.username, password=USER_PASSWORD)
+        resp = self.client.post(url, {'output_format': 'pdf'})
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+        resp = self.client.get(reverse('navoica_api:v1:certificates:export',
+                                       kwargs={'course_id': self.course.id, 'export_id': 1}))
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+        self.client.logout()
+
+    def test_export_file_is_kept_when_task_finishes_first(self):
+        """
+        Test that the file saved by the export task is not overwritten by the view
+        """
+        self.client.login(username=self.instructor.username, password=USER_PASSWORD)
+        resp = self.client.post(reverse('navoica_api:v1:certificates:exports', kwargs={'course_id': self.course.id}),
+                                {'output_format': 'ndjson'})
+        self.assertEqual(resp.status_code, status.HTTP_202_ACCEPTED)
+        self.assertIsNotNone(resp.data['download_url'])
+
+        resp = self.client.get(reverse('navoica_api:v1:certificates:export',
+                                       kwargs={'course_id': self.course.id, 'export_id': resp.data['id']}))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['output_format'], 'ndjson')
+        self.assertTrue(resp.data['download_url'].endswith('.ndjson'))
+        self.assertEqual(CertificateRosterExport.objects.filter(course_id=self.course.id).count(), 1)
+        self.client.logout()
+
+    def test_cursor_pagination(self):
+        """
+        Test that the certificates can be listed with keyset pagination without the total count
+        """
+        self.client.login(username=self.instructor.username, password=USER_PASSWORD)
+        resp = self.client.get(self.get_url(self.course.id), {'pagination': 'cursor', 'page_size': 1})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertNotIn('count', resp.data)
+        self.assertIsNone(resp.data['previous'])
+        self.assertEqual(resp.data['results'][0]['username'], self.student.username)
+
+        resp = self.client.get(self.get_url(self.course.id), {'pagination': 'cursor', 'count': 'true'})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['count'], len(resp.data['results']))
+
+        resp = self.client.get(self.get_url(self.course.id), {'pagination': 'cursor', 'cursor': 'invalid'})
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+        self.client.logout()
+
+    def test_renderer_status_permissions(self):
+        """
+        Test that only the global staff can see counters of the PDF renderer
+        """
+        url = reverse('navoica_api:v1:certificates:renderer_status')
+        self.client.login(username=self.instructor.username, password=USER_PASSWORD)
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+        self.client.logout()
+
+        self.client.login(username=self.staff_user.username, password=USER_PASSWORD)
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['in_flight'], 0)
+        self.assertFalse(resp.data['circuit_open'])
+        self.client.logout()
+
+    def test_roster_list_matches_join(self):
+        """
+        Test that the backfilled roster returns the same certificates and follows user changes
+        """
+        self.client.login(username=self.instructor.username, password=USER_PASSWORD)
+        expected = self.client.get(self.get_url(self.course.id)).data['results']
+
+        backfill_course_roster(self.course.id)
+        resp = self.client.get(self.get_url(self.course.id))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['results'], expected)
+
+        resp = self.client.get(self.get_url(self.course.id), {'search': self.student.username.upper()})
+        self.assertEqual(len(resp.data['results']), 1)
+        resp = self.client.get(self.get_url(self.course.id), {'user__username': 'nobody'})
+        self.assertEqual(len(resp.data['results']), 0)
+
+        self.student.email = 'changed@example.com'
+        self.student.save()
+        resp = self.client.get(self.get_url(self.course.id), {'user__email': 'changed@example.com'})
+        self.assertEqual(resp.data['results'][0]['email'], 'changed@example.com')
+        self.client.logout()
+
+    def test_permissions_do_not_touch_modulestore(self):
+        """
+        Test that permissions are checked without loading the course from the modulestore
+        """
+        self.client.login(username=self.instructor.username, password=USER_PASSWORD)
+        resp = self.client.get(self.get_url(self.course.id))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        resp = self.client.get(self.get_url(self.second_course.id))
+        self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+
+        with check_mongo_calls(0):
+            resp = self.client.get(self.get_url(self.course.id))
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            resp = self.client.get(self.get_url(self.second_course.id))
+            self.assertEqual(resp.status_code, status.HTTP_403_FORBIDDEN)
+        self.client.logout()
+
     def test_course_does_not_exist(self):
         """
         Verify that the course exists
@@ -899,6 +1372,27 @@ class CourseOpinionsViewTest(SharedModuleStoreTestCase, APITestCase):
         self.assertEqual(resp.status_code, status.HTTP_200_OK)
         self.assertGreaterEqual(resp.data.get('results')[0].items(), self.get_test_data(self.course_key).items())
 
+    def test_cached_count_is_invalidated_on_write(self):
+        """
+        Test that the cached count of opinions changes after a new opinion is added
+        """
+        resp = self.client.get(self.get_url(action='list'))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['count'], 0)
+
+        self.client.login(username=self.student.username, password=USER_PASSWORD)
+        resp = self.client.post(self.get_url(action='create'), data=self.get_test_data(self.course_key))
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.client.logout()
+
+        resp = self.client.get(self.get_url(action='list'))
+        self.assertEqual(resp.data['count'], 1)
+
+        # the database of tests has no row estimates, the exact count is returned
+        resp = self.client.get(self.get_url(action='list', query_kwargs={'count': 'estimated'}))
+        self.assertEqual(resp.data['count'], 1)
+        self.assertNotIn('count_estimated', resp.data)
+
 
 # to do | problem z tworzeniem kursu o innej edycji
     # def test_return_opinions_for_all_runs_for_specified_course(self):
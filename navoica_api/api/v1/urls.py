@@ -13,12 +13,38 @@ from navoica_api.course.api.urls import COURSE_INFO_URLS
 app_name = 'v1'
 
 PROGRESS_URLS = ([
+    url(r'^courses/{course_id}/$'.format(
+        course_id=settings.COURSE_ID_PATTERN,
+    ),
+        views.CourseProgressListApiView.as_view(),
+        name='list'),
+    url(r'^courses/{course_id}/distribution/$'.format(
+        course_id=settings.COURSE_ID_PATTERN,
+    ),
+        views.CourseProgressDistributionApiView.as_view(),
+        name='distribution'),
+    url(r'^courses/{course_id}/heatmap/$'.format(
+        course_id=settings.COURSE_ID_PATTERN,
+    ),
+        views.CourseProgressHeatmapApiView.as_view(),
+        name='heatmap'),
+    url(r'^{username}/courses/$'.format(
+        username=settings.USERNAME_PATTERN,
+    ),
+        views.LearnerCoursesProgressApiView.as_view(),
+        name='courses'),
     url(r'^{username}/courses/{course_id}/$'.format(
         username=settings.USERNAME_PATTERN,
         course_id=settings.COURSE_ID_PATTERN,
     ),
         views.CourseProgressApiView.as_view(),
         name='detail'),
+    url(r'^{username}/courses/{course_id}/changes/$'.format(
+        username=settings.USERNAME_PATTERN,
+        course_id=settings.COURSE_ID_PATTERN,
+    ),
+        views.CourseProgressChangesApiView.as_view(),
+        name='changes'),
 ],   'progress')
 
 CERTIFICATES_URLS = ([
@@ -28,6 +54,22 @@ CERTIFICATES_URLS = ([
         ),
         views.CertificatesListView.as_view(), name='list'
     ),
+    url(
+        r'^courses/{course_id}/exports/$'.format(
+            course_id=settings.COURSE_ID_PATTERN
+        ),
+        views.CertificatesExportApiView.as_view(), name='exports'
+    ),
+    url(
+        r'^courses/{course_id}/exports/(?P<export_id>\d+)/$'.format(
+            course_id=settings.COURSE_ID_PATTERN
+        ),
+        views.CertificatesExportApiView.as_view(), name='export'
+    ),
+    url(
+        r'^renderer/status/$',
+        views.CertificatesRendererStatusApiView.as_view(), name='renderer_status'
+    ),
 ], 'certificates')
 
 UPDATEMESSAGES_URLS = ([
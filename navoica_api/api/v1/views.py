@@ -5,7 +5,11 @@ API v1 views.
 from __future__ import absolute_import, unicode_literals
 
 import csv
+import hashlib
+import itertools
+import json
 import logging
+import zlib
 from datetime import datetime, timedelta
 
 from completion.models import BlockCompletion
@@ -13,44 +17,60 @@ from dateutil.parser import parse
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import IntegrityError  # Import IntegrityError
-from django.http import HttpResponse
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Count, F, Max, Q
+from django.http import StreamingHttpResponse
 from django.urls import reverse
+from django.utils.http import http_date, parse_etags, quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
 from edx_rest_framework_extensions.auth.jwt.authentication import \
     JwtAuthentication
 from edx_rest_framework_extensions.auth.session.authentication import \
     SessionAuthenticationAllowInactiveUser
-from edx_rest_framework_extensions.paginators import DefaultPagination
 from edx_rest_framework_extensions.permissions import IsUserInUrl
 from common.djangoapps.student.models import CourseEnrollment
 from lms.djangoapps.certificates.models import GeneratedCertificate
-from lms.djangoapps.course_api.blocks.api import get_blocks
 from lms.djangoapps.courseware import courses  # pylint: disable=import-error
 from lms.djangoapps.courseware.courses import get_courses
+from lms.djangoapps.instructor_task.api_helper import AlreadyRunningError
+from navoica_api.api.pagination import (
+    CachedCountPagination, CertificateKeysetPagination, CourseOpinionKeysetPagination, KeysetPaginationMixin)
 from navoica_api.api.permissions import (
     IsCourseStaffInstructorOrStaff, IsCourseStaffInstructorOrUserInUrlOrStaff,
     IsStaffOrOwner)
-from navoica_api.api.v1.serializers.certificate import \
-    GeneratedCertificateSerializer
+from navoica_api.api.v1.serializers.certificate import (
+    CertificateRosterEntrySerializer, GeneratedCertificateSerializer)
 from navoica_api.api.v1.serializers.career import \
     CareerSerializer
 from navoica_api.api.v1.serializers.opinion import (
     AdminCourseOpinionSerializer, CourseOpinionSerializer,
     CreateCourseOpinionSerializer)
 from navoica_api.api.v1.serializers.user import UserSerializer
-from navoica_api.models import CareerModel, CourseRunOpinionModel
+from navoica_api.certificates.api import export_roster
+from navoica_api.certificates.renderer import get_renderer_status
+from navoica_api.certificates.roster import is_roster_populated
+from navoica_api.models import (
+    CareerModel, CertificateRosterEntry, CertificateRosterExport, CourseRunOpinionModel)
+from navoica_api.progress.bulk import get_learner_courses_progress, iter_course_progress
+from navoica_api.progress.cache import get_course_structure_index, get_published_version
+from navoica_api.progress.heatmap import course_completion_heatmap
+from navoica_api.progress.materialized import get_course_progress
+from navoica_api.progress.statistics import course_progress_distribution
 from opaque_keys import InvalidKeyError
 from opaque_keys.edx.keys import CourseKey
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
 from openedx.core.djangoapps.user_api.course_tag.api import get_course_tag
 from openedx.core.lib.api.authentication import \
     OAuth2AuthenticationAllowInactiveUser
+from openedx.core.lib.api.permissions import IsUserInUrlOrStaff
 from openedx.features.course_experience.views.course_updates import \
     get_ordered_updates
+from pytz import UTC
 from rest_framework import permissions, status, viewsets
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.generics import GenericAPIView, ListAPIView
-from rest_framework.permissions import (IsAuthenticated,
+from rest_framework.permissions import (IsAdminUser, IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
 from rest_framework.response import Response
@@ -62,6 +82,26 @@ from openedx.core.lib.api.view_utils import PaginatedAPIView, get_course_key, ve
 from lms.djangoapps.grades.rest_api.v1.utils import GradeViewMixin
 log = logging.getLogger(__name__)
 
+CSV_EXPORT_CHUNK_SIZE = getattr(settings, 'NAVOICA_CSV_EXPORT_CHUNK_SIZE', 2000)
+
+
+def get_existing_course_key(course_id):
+    """
+    Return CourseKey of the course, checking that the course exists with its CourseOverview.
+
+    Unlike courses.get_course_by_id it does not load the course from the modulestore
+    (only when the overview is missing or outdated).
+
+    Raises:
+        NotFound: if the course does not exist.
+    """
+    course_key = CourseKey.from_string(course_id)
+    try:
+        CourseOverview.get_from_id(course_key)
+    except CourseOverview.DoesNotExist:
+        raise NotFound()
+    return course_key
+
 
 class CourseProgressApiView(GenericAPIView):
     """
@@ -100,10 +140,6 @@ class CourseProgressApiView(GenericAPIView):
             }
     """
 
-    def __init__(self):
-        super(CourseProgressApiView, self).__init__()
-        self.units_progress_list = []
-
     authentication_classes = (OAuth2AuthenticationAllowInactiveUser,
                               SessionAuthenticationAllowInactiveUser,
                               JwtAuthentication,)
@@ -121,48 +157,87 @@ class CourseProgressApiView(GenericAPIView):
         Return:
             A JSON serialized representation of the certificate.
         """
+        course_object_id = get_existing_course_key(course_id)
+        self.check_object_permissions(self.request, course_object_id)
 
-        def aggregate_progress(course_completions, all_blocks, block_id):
-            """
-            Recursively get the progress for a units (vertical),
-            given list of all blocks.
-            Parameters:
-                course_completions: a dictionary of completion values by block IDs
-                all_blocks: a dictionary of the block structure for a subsection
-                block_id: an ID of a block for which to get completion
-            """
-            block = all_blocks.get(block_id)
-            child_ids = block.get('children', [])
-            if block.get('type', None) == 'vertical':
-                self.units_progress_list.append([block_id, 0, 0])
-
-            if not child_ids and (block.get('type', None) in block_xblocks_types_filter):
-                self.units_progress_list[-1][1] += 1
-                self.units_progress_list[-1][2] += course_completions.get(block.serializer.instance, 0)
-
-            for child_id in child_ids:
-                aggregate_progress(course_completions, all_blocks, child_id)
-
-        def calculate_progress():
-            """
-            Calculate course progress from units progress
-            """
-            number_of_units = len(self.units_progress_list)
-            if number_of_units == 0:
-                return float(0.0)
-            else:
-                cumulative_sum = 0
-                for unit_progress in self.units_progress_list:
-                    if unit_progress[1] == 0:
-                        number_of_units -= 1
-                    else:
-                        cumulative_sum += unit_progress[2]/unit_progress[1]
-                return round(cumulative_sum/number_of_units, 3)
-
-        course_object_id = CourseKey.from_string(course_id)
-        self.check_object_permissions(self.request, courses.get_course_by_id(course_object_id))
-        course_usage_key = modulestore().make_course_usage_key(course_object_id)
+        try:
+            user_id = User.objects.get(username=username).id
+        except User.DoesNotExist:
+            return Response(
+                status=404,
+                data={'detail': u'Not found.'}
+            )
+
+        try:
+            calculated_progress = get_course_progress(user_id, course_object_id)
+        except ItemNotFoundError:
+            return Response(
+                status=404,
+                data={'detail': u'Not found.'}
+            )
+
+        response_dict = {"username": username,
+                         "course_id": course_id,
+                         "completion_value": calculated_progress}
+
+        return Response(response_dict, status=status.HTTP_200_OK)
+
+
+class LearnerCoursesProgressApiView(GenericAPIView):
+    """
+        **Use Case**
+            * Get completion of many courses of one learner.
+        **Example Request**
+            GET /api/navoica/v1/progress/{username}/courses/?course_id={course_id}&course_id={course_id}
+
+        **GET Parameters**
+
+            A GET request must include the following parameters.
+
+            * username: A string representation of an user's username.
+
+        ** Query parameters**
+
+            * course_id: A string representation of a Course ID, can be repeated.
+              Without it all courses with active enrollment of the user are returned.
+
+        **GET Response Values**
+
+            If the request for information about the Progress is successful, an HTTP 200 "OK" response
+            is returned.
+
+            The HTTP 200 response has the following values.
+
+            * username: A string representation of an user's username passed in the request.
+
+            * courses: A dictionary of completion_value by Course ID, courses which do not exist are omitted.
+
+        **Example GET Response**
+            {
+                "username": "bob",
+                "courses": {
+                    "course-v1:edX+DemoX+Demo_Course": 0.800,
+                    "course-v1:edX+DemoX+2021": 0.0
+                }
+            }
+    """
 
+    authentication_classes = (OAuth2AuthenticationAllowInactiveUser,
+                              SessionAuthenticationAllowInactiveUser,
+                              JwtAuthentication,)
+    permission_classes = (IsAuthenticated, IsUserInUrlOrStaff)
+
+    def get(self, request, username):
+        """
+        Gets a progress information of many courses.
+
+        Args:
+            request (Request): Django request object.
+            username (string): URI element specifying the user's username.
+
+        Return:
+            A JSON serialized representation of the progress.
+        """
         try:
             user_id = User.objects.get(username=username).id
         except User.DoesNotExist:
@@ -171,35 +246,463 @@ class CourseProgressApiView(GenericAPIView):
                 data={'detail': u'Not found.'}
             )
 
-        block_navigation_types_filter = settings.BLOCK_NAVIGATION_TYPES_FILTER
+        course_ids = request.query_params.getlist('course_id')
+        if course_ids:
+            try:
+                course_keys = [CourseKey.from_string(course_id) for course_id in course_ids]
+            except InvalidKeyError:
+                raise ValidationError(detail={'course_id': 'Invalid course id.'})
+        else:
+            course_keys = list(CourseEnrollment.objects.filter(
+                user_id=user_id, is_active=True
+            ).values_list('course_id', flat=True))
+
+        courses_progress = get_learner_courses_progress(user_id, course_keys)
+        response_dict = {"username": username,
+                         "courses": {text_type(course_key): completion_value
+                                     for course_key, completion_value in courses_progress.items()}}
+
+        return Response(response_dict, status=status.HTTP_200_OK)
+
+
+class CourseProgressChangesApiView(GenericAPIView):
+    """
+        **Use Case**
+            * Get units of the course which completion changed since given time.
+        **Example Request**
+            GET /api/navoica/v1/progress/{username}/courses/{course_id}/changes/?since=2021-01-01T10:00:00Z
+
+        **GET Parameters**
+
+            A GET request must include the following parameters.
+
+            * username: A string representation of an user's username.
+            * course_id: A string representation of a Course ID.
+
+        ** Query parameters**
+
+            * since: ISO 8601 timestamp, without it all units are returned
+
+        **GET Response Values**
+
+            If the request for information about the Progress is successful, an HTTP 200 "OK" response
+            is returned. The response has ETag and Last-Modified headers, repeating the request with
+            If-None-Match header returns HTTP 304 "Not Modified" until the progress changes.
+
+            The HTTP 200 response has the following values.
+
+            * username: A string representation of an user's username passed in the request.
+
+            * course_id: A string representation of a Course ID.
+
+            * completion_value: A float between 0 and 1, when 1 meaning 100% completion
+
+            * modified: time of the last change of the learner's completion or null
+
+            * units: list of changed units with id and completion_value of the unit
+
+        **Example GET Response**
+            {
+                "username": "bob",
+                "course_id": "edX/DemoX/Demo_Course",
+                "completion_value": 0.800,
+                "modified": "2021-01-02T10:00:00Z",
+                "units": [
+                    {
+                        "id": "block-v1:edX+DemoX+Demo_Course+type@vertical+block@1",
+                        "completion_value": 0.5
+                    }
+                ]
+            }
+    """
+
+    authentication_classes = (OAuth2AuthenticationAllowInactiveUser,
+                              SessionAuthenticationAllowInactiveUser,
+                              JwtAuthentication,)
+    permission_classes = (IsAuthenticated, IsCourseStaffInstructorOrUserInUrlOrStaff)
+
+    def get(self, request, username, course_id):
+        """
+        Gets changes of progress.
 
-        block_xblocks_types_filter = settings.BLOCK_XBLOCKS_TYPES_FILTER
+        Args:
+            request (Request): Django request object.
+            username (string): URI element specifying the user's username.
+            course_id (string): URI element specifying the course location.
 
-        block_types_filter = block_navigation_types_filter + block_xblocks_types_filter
+        Return:
+            A JSON serialized representation of the changed units.
+        """
+        course_object_id = get_existing_course_key(course_id)
+        self.check_object_permissions(self.request, course_object_id)
+
+        since = request.query_params.get('since')
+        if since:
+            try:
+                since = parse(since)
+            except (ValueError, OverflowError):
+                raise ValidationError(detail={'since': 'Invalid ISO 8601 timestamp.'})
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=UTC)
 
         try:
-            blocks = get_blocks(request, course_usage_key, nav_depth=3, requested_fields=[
-                'children', 'type',
-            ],
-                block_types_filter=block_types_filter
+            user_id = User.objects.get(username=username).id
+            version = get_published_version(course_object_id)
+        except (User.DoesNotExist, ItemNotFoundError):
+            return Response(
+                status=404,
+                data={'detail': u'Not found.'}
             )
+
+        course_completions = BlockCompletion.objects.filter(user_id=user_id, context_key=course_object_id)
+        # number of completions changes the ETag also when a completion was deleted
+        completions_state = course_completions.aggregate(last_modified=Max('modified'), count=Count('id'))
+        last_modified = completions_state['last_modified']
+        etag = quote_etag(hashlib.md5(u"{}|{}|{}|{}".format(
+            version, last_modified.isoformat() if last_modified else '', completions_state['count'],
+            since.isoformat() if since else ''
+        ).encode('utf-8')).hexdigest())
+
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            # the body is built from the same completions as the ETag, the stored progress
+            # is updated by a task after the commit and can be behind them
+            structure_index = get_course_structure_index(course_object_id)
+            unit_sums = structure_index.unit_sums(course_completions.values_list('block_key', 'completion'))
+            if since:
+                changed_blocks = course_completions.filter(modified__gt=since).values_list('block_key', flat=True)
+                changed_units = {structure_index.unit_of_block(block_key) for block_key in changed_blocks}
+                changed_units.discard(None)
+            else:
+                changed_units = range(len(structure_index.unit_ids))
+
+            units = [
+                {"id": structure_index.unit_ids[unit_index],
+                 "completion_value": round(unit_sums[unit_index] / structure_index.unit_sizes[unit_index], 3)}
+                for unit_index in sorted(changed_units) if structure_index.unit_sizes[unit_index]
+            ]
+            response = Response({"username": username,
+                                 "course_id": course_id,
+                                 "completion_value": structure_index.progress_from_sums(unit_sums),
+                                 "modified": last_modified,
+                                 "units": units}, status=status.HTTP_200_OK)
+
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
+
+
+def keyset_after(fields):
+    """
+    Return Q object selecting rows after the row with given values of the ordering fields.
+
+    Args:
+        fields: list of (field name, descending, value of the last row), nulls are ordered
+            first in ascending and last in descending fields.
+    """
+    def after(field, descending, value):
+        if value is None:
+            return None if descending else Q(**{field + '__isnull': False})
+        if descending:
+            return Q(**{field + '__lt': value}) | Q(**{field + '__isnull': True})
+        return Q(**{field + '__gt': value})
+
+    def equal(field, value):
+        if value is None:
+            return Q(**{field + '__isnull': True})
+        return Q(**{field: value})
+
+    condition = None
+    for index, (field, descending, value) in enumerate(fields):
+        field_after = after(field, descending, value)
+        if field_after is None:
+            continue
+        for equal_field, _descending, equal_value in fields[:index]:
+            field_after &= equal(equal_field, equal_value)
+        condition = field_after if condition is None else condition | field_after
+    if condition is None:
+        # the last row is last in every field, nothing follows it
+        return Q(pk__in=[])
+    return condition
+
+
+class Echo(object):
+    """
+    An object that implements just the write method of the file-like interface.
+    """
+
+    def write(self, value):
+        return value
+
+
+def gzip_stream(chunks):
+    """
+    Compress the stream of text chunks on the fly into gzip format.
+    """
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk.encode('utf-8'))
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+class CourseProgressListApiView(GenericAPIView):
+    """
+        **Use Case**
+            * Get course completion of all learners enrolled in the course.
+        **Example Request**
+            GET /api/navoica/v1/progress/courses/{course_id}/?output_format=csv
+
+        **GET Parameters**
+
+            A GET request must include the following parameters.
+
+            * course_id: A string representation of a Course ID.
+
+        ** Query parameters**
+
+            * output_format: ndjson (default) or csv
+
+        **GET Response Values**
+
+            If the request is successful, an HTTP 200 "OK" response is returned.
+            The response is streamed, one line for each enrolled learner:
+
+            * username: A string representation of an user's username.
+
+            * course_id: A string representation of a Course ID.
+
+            * completion_value: A float between 0 and 1, when 1 meaning 100% completion
+
+        **Example GET Response**
+            {"username": "bob", "course_id": "edX/DemoX/Demo_Course", "completion_value": 0.8}
+            {"username": "alice", "course_id": "edX/DemoX/Demo_Course", "completion_value": 0.0}
+    """
+
+    authentication_classes = (OAuth2AuthenticationAllowInactiveUser,
+                              SessionAuthenticationAllowInactiveUser,
+                              JwtAuthentication,)
+    permission_classes = (IsAuthenticated, IsCourseStaffInstructorOrStaff)
+
+    output_formats = ('ndjson', 'csv')
+
+    def get(self, request, course_id):
+        """
+        Gets a progress information of all learners.
+
+        Args:
+            request (Request): Django request object.
+            course_id (string): URI element specifying the course location.
+
+        Return:
+            A streamed NDJSON or CSV representation of the progress.
+        """
+        course_object_id = get_existing_course_key(course_id)
+        self.check_object_permissions(self.request, course_object_id)
+
+        output_format = request.query_params.get('output_format', 'ndjson')
+        if output_format not in self.output_formats:
+            raise ValidationError(detail={'output_format': 'Choose one of: {}.'.format(', '.join(self.output_formats))})
+
+        try:
+            structure_index = get_course_structure_index(course_object_id)
         except ItemNotFoundError:
             return Response(
                 status=404,
                 data={'detail': u'Not found.'}
             )
 
-        course_completions = BlockCompletion.get_learning_context_completions(user_id, course_object_id)
-        aggregate_progress(course_completions, blocks['blocks'], blocks['root'])
-        calculated_progress = calculate_progress()
-        response_dict = {"username": username,
-                         "course_id": course_id,
-                         "completion_value": calculated_progress}
+        learners_progress = iter_course_progress(course_object_id, structure_index)
 
+        if output_format == 'csv':
+            writer = csv.writer(Echo())
+            rows = itertools.chain(
+                [writer.writerow(['username', 'course_id', 'completion_value'])],
+                (writer.writerow([username, course_id, completion_value])
+                 for _user_id, username, completion_value in learners_progress)
+            )
+            response = StreamingHttpResponse(rows, content_type='text/csv')
+            response['Content-Disposition'] = 'attachment; filename={}'.format(
+                "progress_{}.csv".format(datetime.now().strftime("%Y_%m_%d-%I_%M_%S")))
+        else:
+            rows = (json.dumps({"username": username,
+                                "course_id": course_id,
+                                "completion_value": completion_value}) + '\n'
+                    for _user_id, username, completion_value in learners_progress)
+            response = StreamingHttpResponse(rows, content_type='application/x-ndjson')
+        return response
+
+
+class CourseProgressDistributionApiView(GenericAPIView):
+    """
+        **Use Case**
+            * Get distribution of course completion of all learners enrolled in the course.
+        **Example Request**
+            GET /api/navoica/v1/progress/courses/{course_id}/distribution/?bins=10
+
+        **GET Parameters**
+
+            A GET request must include the following parameters.
+
+            * course_id: A string representation of a Course ID.
+
+        ** Query parameters**
+
+            * bins: number of histogram bins between 0 and 1 (default 10)
+
+        **GET Response Values**
+
+            If the request is successful, an HTTP 200 "OK" response is returned.
+
+            The HTTP 200 response has the following values.
+
+            * course_id: A string representation of a Course ID.
+
+            * learners: number of enrolled learners
+
+            * mean: mean completion_value or null for course without learners
+
+            * quantiles: completion_value by quantile
+
+            * histogram: bins edges and number of learners in each bin
+
+        **Example GET Response**
+            {
+                "course_id": "edX/DemoX/Demo_Course",
+                "learners": 3,
+                "mean": 0.4,
+                "quantiles": {"0.1": 0.0, "0.25": 0.0, "0.5": 0.2, "0.75": 0.6, "0.9": 0.84},
+                "histogram": {"bins": [0.0, 0.5, 1.0], "counts": [2, 1]}
+            }
+    """
+
+    authentication_classes = (OAuth2AuthenticationAllowInactiveUser,
+                              SessionAuthenticationAllowInactiveUser,
+                              JwtAuthentication,)
+    permission_classes = (IsAuthenticated, IsCourseStaffInstructorOrStaff)
+
+    def get(self, request, course_id):
+        """
+        Gets a distribution of progress.
+
+        Args:
+            request (Request): Django request object.
+            course_id (string): URI element specifying the course location.
+
+        Return:
+            A JSON serialized representation of the distribution.
+        """
+        course_object_id = get_existing_course_key(course_id)
+        self.check_object_permissions(self.request, course_object_id)
+
+        try:
+            bins = int(request.query_params.get('bins', 10))
+        except ValueError:
+            bins = 0
+        if not 1 <= bins <= 100:
+            raise ValidationError(detail={'bins': 'Number of bins must be between 1 and 100.'})
+
+        try:
+            structure_index = get_course_structure_index(course_object_id)
+        except ItemNotFoundError:
+            return Response(
+                status=404,
+                data={'detail': u'Not found.'}
+            )
+
+        response_dict = {"course_id": course_id}
+        response_dict.update(course_progress_distribution(course_object_id, structure_index, bins=bins))
         return Response(response_dict, status=status.HTTP_200_OK)
 
 
-class CertificatesListView(ListAPIView):
+class CourseProgressHeatmapApiView(GenericAPIView):
+    """
+        **Use Case**
+            * Get share of enrolled learners who completed each unit and xblock of the course.
+        **Example Request**
+            GET /api/navoica/v1/progress/courses/{course_id}/heatmap/
+
+        **GET Parameters**
+
+            A GET request must include the following parameters.
+
+            * course_id: A string representation of a Course ID.
+
+        **GET Response Values**
+
+            If the request is successful, an HTTP 200 "OK" response is returned.
+
+            The HTTP 200 response has the following values.
+
+            * course_id: A string representation of a Course ID.
+
+            * learners: number of enrolled learners
+
+            * units: list of units in course order, each with:
+
+                * id: usage id of the unit
+
+                * completion_share: mean completion_share of xblocks of the unit
+
+                * blocks: list of xblocks of the unit with id, number of learners who
+                  completed it and completion_share
+
+        **Example GET Response**
+            {
+                "course_id": "edX/DemoX/Demo_Course",
+                "learners": 10,
+                "units": [
+                    {
+                        "id": "block-v1:edX+DemoX+Demo_Course+type@vertical+block@1",
+                        "completion_share": 0.4,
+                        "blocks": [
+                            {
+                                "id": "block-v1:edX+DemoX+Demo_Course+type@problem+block@2",
+                                "completed": 4,
+                                "completion_share": 0.4
+                            }
+                        ]
+                    }
+                ]
+            }
+    """
+
+    authentication_classes = (OAuth2AuthenticationAllowInactiveUser,
+                              SessionAuthenticationAllowInactiveUser,
+                              JwtAuthentication,)
+    permission_classes = (IsAuthenticated, IsCourseStaffInstructorOrStaff)
+
+    def get(self, request, course_id):
+        """
+        Gets a completion heatmap.
+
+        Args:
+            request (Request): Django request object.
+            course_id (string): URI element specifying the course location.
+
+        Return:
+            A JSON serialized representation of the heatmap.
+        """
+        course_object_id = get_existing_course_key(course_id)
+        self.check_object_permissions(self.request, course_object_id)
+
+        try:
+            structure_index = get_course_structure_index(course_object_id)
+        except ItemNotFoundError:
+            return Response(
+                status=404,
+                data={'detail': u'Not found.'}
+            )
+
+        response_dict = {"course_id": course_id}
+        response_dict.update(course_completion_heatmap(course_object_id, structure_index))
+        return Response(response_dict, status=status.HTTP_200_OK)
+
+
+class CertificatesListView(KeysetPaginationMixin, ListAPIView):
     """
         **Use Case**
 
@@ -217,10 +720,17 @@ class CertificatesListView(ListAPIView):
 
         ** Query parameters**
 
-            * attachment: return ['Content-Disposition'] = 'attachment; filename={} response
+            * attachment: return ['Content-Disposition'] = 'attachment; filename={} response,
+            the CSV file is streamed
+
+            * gzip: with attachment, compress the streamed CSV file with gzip
+
+            * pagination=cursor: keyset pagination ordered by created_date and id, the response
+            has next, previous and results, count only with count=true
 
             * filters/search/ordering attributes: ('user__profile__name', 'user__username',
-            'user__email', 'created_date',)
+            'user__email', 'created_date',), for courses with backfilled roster of certificates
+            they are applied to the denormalized roster instead of joining users and profiles
 
         **Response Values**
 
@@ -255,18 +765,30 @@ class CertificatesListView(ListAPIView):
                               SessionAuthenticationAllowInactiveUser,
                               JwtAuthentication,)
     permission_classes = (IsAuthenticated, IsCourseStaffInstructorOrStaff)
-    pagination_class = DefaultPagination
+    pagination_class = CachedCountPagination
+    keyset_pagination_class = CertificateKeysetPagination
     serializer_class = GeneratedCertificateSerializer
     renderer_classes = (JSONRenderer, BrowsableAPIRenderer)
     filter_backends = (OrderingFilter, DjangoFilterBackend, SearchFilter)
     filterset_fields = search_fields = ordering_fields = ('user__profile__name', 'user__username',
                                                           'user__email', 'created_date',)
 
+    roster_fields = {
+        'user__profile__name': 'profile_name',
+        'user__username': 'username',
+        'user__email': 'email',
+        'created_date': 'created_date',
+    }
+    roster_search_fields = ('profile_name_search', 'username_search', 'email_search')
+
     def __init__(self):
         super(CertificatesListView, self).__init__()
         self.course_id = None
+        self.use_roster = False
 
     def get_queryset(self):
+        if self.use_roster:
+            return CertificateRosterEntry.objects.filter(course_id=self.course_id)
         try:
             certs = GeneratedCertificate.eligible_certificates.filter(
                 course_id=self.course_id
@@ -275,29 +797,120 @@ class CertificatesListView(ListAPIView):
         except GeneratedCertificate.DoesNotExist:
             return None
 
+    def get_serializer_class(self):
+        if self.use_roster:
+            return CertificateRosterEntrySerializer
+        return super(CertificatesListView, self).get_serializer_class()
+
+    def filter_roster_queryset(self, queryset):
+        """
+        Apply the filters, search and ordering of the view to the roster rows.
+
+        Query parameters keep the names of the GeneratedCertificate fields and are
+        translated to the roster columns; search terms match the lower-cased columns.
+        """
+        query_params = self.request.query_params
+        for param, column in self.roster_fields.items():
+            value = query_params.get(param)
+            if value in (None, ''):
+                continue
+            try:
+                value = CertificateRosterEntry._meta.get_field(column).to_python(value)
+            except DjangoValidationError as error:
+                raise ValidationError({param: error.messages})
+            queryset = queryset.filter(**{column: value})
+
+        for term in SearchFilter().get_search_terms(self.request):
+            term = term.lower()
+            conditions = Q()
+            for column in self.roster_search_fields:
+                conditions |= Q(**{'{}__contains'.format(column): term})
+            queryset = queryset.filter(conditions)
+
+        ordering = []
+        for field in query_params.get(OrderingFilter.ordering_param, '').split(','):
+            field = field.strip()
+            column = self.roster_fields.get(field.lstrip('-'))
+            if column:
+                ordering.append('-' + column if field.startswith('-') else column)
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+        return queryset
+
     def check_course_permissions_and_return_queryset(self):
-        self.course_id = CourseKey.from_string(self.kwargs.get('course_id', None))
-        self.check_object_permissions(self.request, courses.get_course_by_id(self.course_id))
+        self.course_id = get_existing_course_key(self.kwargs.get('course_id', None))
+        self.check_object_permissions(self.request, self.course_id)
+        self.count_cache_course_ids = [self.course_id]
+        self.use_roster = is_roster_populated(self.course_id)
+        if self.use_roster:
+            return self.filter_roster_queryset(self.get_queryset())
         return self.filter_queryset(self.get_queryset())
 
     def get(self, request, *args, **kwargs):
         return self.list(request, *args, **kwargs)
 
+    @staticmethod
+    def iter_chunked(queryset, chunk_size=None):
+        """
+        Yield objects of the queryset in its ordering, one query per chunk.
+
+        Chunks are selected by values of the ordering fields and the primary key of the
+        last object of the previous chunk (keyset), the primary key makes the ordering unique.
+        """
+        chunk_size = chunk_size or CSV_EXPORT_CHUNK_SIZE
+        ordering = [field for field in queryset.query.order_by if field.lstrip('-') not in ('pk', 'id')] + ['pk']
+        fields = [(u'_keyset_{}'.format(index), field.startswith('-')) for index, field in enumerate(ordering)]
+        queryset = queryset.annotate(**{
+            alias: F(field.lstrip('-')) for (alias, _descending), field in zip(fields, ordering)
+        }).order_by(*[
+            F(alias).desc(nulls_last=True) if descending else F(alias).asc(nulls_first=True)
+            for alias, descending in fields
+        ])
+
+        condition = None
+        while True:
+            chunk = list((queryset if condition is None else queryset.filter(condition))[:chunk_size])
+            if not chunk:
+                return
+            for obj in chunk:
+                yield obj
+            condition = keyset_after([(alias, descending, getattr(chunk[-1], alias)) for alias, descending in fields])
+
+    def iter_csv_rows(self, queryset):
+        """
+        Yield CSV lines of the serialized certificates.
+
+        Certificates with their users and profiles are fetched in chunks in the requested
+        ordering (keyset), so the memory usage does not depend on the number of
+        certificates, also with database drivers without server-side cursors.
+        """
+        writer = csv.writer(Echo())
+        if not self.use_roster:
+            queryset = queryset.select_related('user', 'user__profile')
+        certs = self.iter_chunked(queryset)
+        first_cert = next(certs, None)
+        if first_cert is None:
+            yield writer.writerow(['Empty list', ])
+            return
+
+        cert = self.get_serializer(first_cert).data
+        yield writer.writerow(cert.keys())
+        yield writer.writerow(cert.values())
+        for cert in certs:
+            yield writer.writerow(self.get_serializer(cert).data.values())
+
     def list(self, request, *args, **kwargs):
         queryset = self.check_course_permissions_and_return_queryset()
 
         if 'attachment' in self.request.query_params:
-            response = HttpResponse(content_type='text/csv')
-            response['Content-Disposition'] = 'attachment; filename={}'.format("report_{}.csv"
-                                                                               .format(datetime.now().strftime("%Y_%m_%d-%I_%M_%S")))
-            writer = csv.writer(response)
-            certs = self.get_serializer(queryset, many=True).data
-            if certs:
-                writer.writerow(certs[0].keys())
-                for cert in certs:
-                    writer.writerow(cert.values())
+            filename = "report_{}.csv".format(datetime.now().strftime("%Y_%m_%d-%I_%M_%S"))
+            rows = self.iter_csv_rows(queryset)
+            if 'gzip' in self.request.query_params:
+                response = StreamingHttpResponse(gzip_stream(rows), content_type='application/gzip')
+                filename += '.gz'
             else:
-                writer.writerow(['Empty list', ])
+                response = StreamingHttpResponse(rows, content_type='text/csv')
+            response['Content-Disposition'] = 'attachment; filename={}'.format(filename)
             return response
         else:
             page = self.paginate_queryset(queryset)
@@ -309,9 +922,134 @@ class CertificatesListView(ListAPIView):
             return Response(serializer.data)
 
 
+class CertificatesExportApiView(GenericAPIView):
+    """
+        **Use Case**
+
+            * Export the roster of generated certificates of the course in the background
+
+        **Example Request**
+
+            POST /api/navoica/v1/certificates/courses/{course_id}/exports/
+            with payload
+            {
+                "output_format": "csv"
+            }
+
+            GET /api/navoica/v1/certificates/courses/{course_id}/exports/{export_id}/
+
+        **POST Parameters**
+
+            * output_format: csv (default), ndjson or xlsx
+
+        **Response Values**
+
+            POST starts the export task and returns HTTP 202 "Accepted" response,
+            HTTP 409 "Conflict" if the same export of the course is already running.
+            Both POST and GET return the status of the export:
+
+            * id: The export identifier.
+
+            * course_id: A string representation of a Course ID.
+
+            * output_format: format of the file
+
+            * status: state of the task (e.g. QUEUING, PROGRESS, SUCCESS, FAILURE)
+
+            * progress: progress of the task reported by the task
+
+            * download_url: url of the file when the export is finished, otherwise null
+    """
+
+    authentication_classes = (OAuth2AuthenticationAllowInactiveUser,
+                              SessionAuthenticationAllowInactiveUser,
+                              JwtAuthentication,)
+    permission_classes = (IsAuthenticated, IsCourseStaffInstructorOrStaff)
+
+    def export_status(self, roster_export):
+        instructor_task = roster_export.instructor_task
+        return {
+            "id": roster_export.id,
+            "course_id": text_type(roster_export.course_id),
+            "output_format": roster_export.output_format,
+            "status": instructor_task.task_state,
+            "progress": json.loads(instructor_task.task_output) if instructor_task.task_output else None,
+            "download_url": roster_export.file.url if roster_export.file.name else None,
+        }
+
+    def get(self, request, course_id, export_id):
+        course_key = get_existing_course_key(course_id)
+        self.check_object_permissions(self.request, course_key)
+        try:
+            roster_export = CertificateRosterExport.objects.select_related('instructor_task').get(
+                id=export_id, course_id=course_key
+            )
+        except CertificateRosterExport.DoesNotExist:
+            raise NotFound()
+        return Response(self.export_status(roster_export), status=status.HTTP_200_OK)
+
+    def post(self, request, course_id):
+        course_key = get_existing_course_key(course_id)
+        self.check_object_permissions(self.request, course_key)
+
+        output_format = request.data.get('output_format', CertificateRosterExport.CSV)
+        if output_format not in dict(CertificateRosterExport.OUTPUT_FORMAT_CHOICES):
+            raise ValidationError(detail={'output_format': 'Choose one of: {}.'.format(
+                ', '.join(dict(CertificateRosterExport.OUTPUT_FORMAT_CHOICES)))})
+
+        try:
+            roster_export = export_roster(request, course_key, output_format)
+        except AlreadyRunningError:
+            return Response(
+                status=status.HTTP_409_CONFLICT,
+                data={'detail': u'The export of certificates is already running.'}
+            )
+        return Response(self.export_status(roster_export), status=status.HTTP_202_ACCEPTED)
+
+
 PREFERENCE_KEY = 'view-welcome-message'
 
 
+class CertificatesRendererStatusApiView(APIView):
+    """
+        **Use Case**
+
+            * Monitor the PDF renderer of certificates (Gotenberg) shared by all workers
+
+        **Example Request**
+
+            GET /api/navoica/v1/certificates/renderer/status/
+
+        **Response Values**
+
+            If the user is global staff, an HTTP 200 "OK" response is returned with values:
+
+            * in_flight: number of renders running now in all workers
+
+            * max_in_flight: cluster-wide limit of running renders
+
+            * queued: number of renders deferred while the renderer was unavailable
+
+            * rejected: number of renders rejected by the limit or the circuit breaker
+
+            * calls: number of renders in the current failure window
+
+            * failures: number of failed renders in the current failure window
+
+            * circuit_open: true when render tasks are paused
+
+            * circuit_half_open: true after the pause, until the probe render succeeds
+    """
+
+    authentication_classes = (OAuth2AuthenticationAllowInactiveUser,
+                              SessionAuthenticationAllowInactiveUser,
+                              JwtAuthentication,)
+    permission_classes = (IsAuthenticated, IsAdminUser)
+
+    def get(self, request):
+        return Response(get_renderer_status(), status=status.HTTP_200_OK)
+
+
 class CourseUpdatesMessagesApiView(GenericAPIView):
     """
         **Use Case**
@@ -479,7 +1217,7 @@ class UserApiView(APIView):
         return Response(UserSerializer(request.user).data)
 
 
-class CourseRunOpinionViewSet(viewsets.ModelViewSet):
+class CourseRunOpinionViewSet(KeysetPaginationMixin, viewsets.ModelViewSet):
     """
     **Use Cases**
         Restful CRUD operations on course opinions.
@@ -492,6 +1230,12 @@ class CourseRunOpinionViewSet(viewsets.ModelViewSet):
             returns opinions filtered by course_id and username
         GET /api/navoica/v1/courseopinion/{id}
             returns specified opinion
+        GET /api/navoica/v1/courseopinion?pagination=cursor&count=true
+            returns opinions with keyset pagination ordered by created and id,
+            count is returned only when requested
+        GET /api/navoica/v1/courseopinion?count=estimated
+            returns all opinions with the number of opinions estimated by the database,
+            filtered listings return the exact count cached for a short time
 
         POST /api/navoica/v1/courseopinion
             with payload
@@ -529,6 +1273,8 @@ class CourseRunOpinionViewSet(viewsets.ModelViewSet):
                               JwtAuthentication,)
     permission_classes = (IsAuthenticatedOrReadOnly, IsStaffOrOwner,)
     serializer_class = CourseOpinionSerializer
+    pagination_class = CachedCountPagination
+    keyset_pagination_class = CourseOpinionKeysetPagination
     lookup_field = 'id'
     filter_backends = (OrderingFilter, DjangoFilterBackend, SearchFilter)
     filterset_fields = ordering_fields = ('created',)
@@ -537,10 +1283,9 @@ class CourseRunOpinionViewSet(viewsets.ModelViewSet):
         try:
             filter_dict = {}
             if course_key := (course_id := self.request.query_params.get('course_id')) and CourseKey.from_string(course_id):
-                filtered_courses_id = (course.id for course in get_courses(
-                    self.request.user, org=course_key.org) if course.number == course_key.course)
-                if filtered_courses_id:
-                    filter_dict['course_id__in'] = filtered_courses_id
+                filtered_courses_id = [course.id for course in get_courses(
+                    self.request.user, org=course_key.org) if course.number == course_key.course]
+                filter_dict['course_id__in'] = self.count_cache_course_ids = filtered_courses_id
 
                 if (username := self.request.query_params.get('username')):
                     filter_dict['user__username'] = username
@@ -17,6 +17,12 @@ class NavoicaApiConfig(AppConfig):
         from navoica_api.certificates.signals.handlers import update_course_enrollment
         # noinspection PyUnresolvedReferences
         from navoica_api.videos.signals.handlers import encode_video_recv
+        # noinspection PyUnresolvedReferences
+        from navoica_api.progress.signals.handlers import invalidate_structure_on_publish
+        # noinspection PyUnresolvedReferences
+        from navoica_api.roles.signals.handlers import invalidate_roles
+        # noinspection PyUnresolvedReferences
+        from navoica_api.api.signals.handlers import invalidate_counts
 
     # plugin_app = {
     #     PluginURLs.CONFIG: {
@@ -4,7 +4,7 @@ from django.views.decorators.cache import cache_control
 from django.views.decorators.http import require_http_methods, require_POST
 from lms.djangoapps.instructor.views.api import common_exceptions_400
 from opaque_keys.edx.keys import CourseKey
-from navoica_api.certificates.tasks import merge_all_certificates
+from navoica_api.certificates.tasks import export_certificates_roster, merge_all_certificates
 from lms.djangoapps.instructor_task.api_helper import (
     check_arguments_for_overriding, check_arguments_for_rescoring,
     check_entrance_exam_problems_for_rescoring,
@@ -13,7 +13,7 @@ from lms.djangoapps.instructor_task.api_helper import (
 from common.djangoapps.util.json_request import JsonResponse
 from django.utils.translation import ugettext as _
 
-from navoica_api.models import CertificateGenerationMergeHistory
+from navoica_api.models import CertificateGenerationMergeHistory, CertificateRosterExport
 
 
 def merge_certificates(request, course_key):
@@ -35,6 +35,32 @@ def merge_certificates(request, course_key):
 
     return instructor_task
 
+
+def export_roster(request, course_key, output_format):
+    task_type = 'export_certificates_roster'
+    task_input = {'output_format': output_format}
+
+    task_class = export_certificates_roster
+    task_key = output_format
+
+    instructor_task = submit_task(request, task_type, task_class, course_key,
+                                  task_input, task_key)
+
+    # the export is unique per task, the task may have already created it
+    roster_export, created = CertificateRosterExport.objects.get_or_create(
+        instructor_task=instructor_task,
+        defaults={'course_id': course_key, 'generated_by': request.user, 'output_format': output_format},
+    )
+    if created:
+        return roster_export
+    roster_export.course_id = course_key
+    roster_export.generated_by = request.user
+    roster_export.output_format = output_format
+    # the task may have already saved the file, don't overwrite it
+    roster_export.save(update_fields=['course_id', 'generated_by', 'output_format', 'modified'])
+
+    return roster_export
+
 @transaction.non_atomic_requests
 @ensure_csrf_cookie
 @cache_control(no_cache=True, no_store=True, must_revalidate=True)
@@ -1,51 +1,335 @@
+import csv
+import hashlib
+import io
+import itertools
+import json
 import logging
-import os
-from shutil import make_archive
+import shutil
+import tempfile
 from time import time
-from urllib.parse import urlparse
+from urllib.parse import unquote, urlparse
 import uuid
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 import requests
 from bs4 import BeautifulSoup
 from django.conf import settings
-from django.core.files.base import ContentFile
+from django.core.files import File
 from django.core.files.storage import default_storage
+from django.db import transaction
+from lms.djangoapps.certificates.api import certificates_viewable_for_course
 from lms.djangoapps.certificates.models import CertificateStatuses, GeneratedCertificate
 from lms.djangoapps.instructor_task.models import InstructorTask
 from lms.djangoapps.instructor_task.tasks_helper.runner import TaskProgress
 from django.utils.translation import ugettext as _
-from navoica_api.models import CertificateGenerationMergeHistory
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from navoica_api.api.v1.serializers.certificate import GeneratedCertificateSerializer
+from navoica_api.certificates.gotenberg import (
+    GOTENBERG_CHUNK_SIZE, GotenbergError, convert_html, get_session, get_timeout)
+from navoica_api.certificates.html import get_certificate_html
+from navoica_api.certificates.renderer import (
+    RendererUnavailable, is_circuit_open, record_failure, record_success, renderer_slot)
+from navoica_api.models import (
+    CertificateGenerationMergeHistory, CertificatePdfDigest, CertificateRosterExport, GeneratedCertificatePdf)
 
 log = logging.getLogger(__name__)
 
-def render_pdf(html, certificate_pk):
+ROSTER_EXPORT_CHUNK_SIZE = getattr(settings, 'NAVOICA_CERTIFICATES_ROSTER_CHUNK_SIZE', 2000)
+RENDER_BATCH_PARALLELISM = getattr(settings, 'NAVOICA_CERTIFICATES_RENDER_BATCH_PARALLELISM', 4)
+MERGE_PARALLELISM = getattr(settings, 'NAVOICA_CERTIFICATES_MERGE_PARALLELISM', 8)
+MERGE_PROGRESS_EVERY = getattr(settings, 'NAVOICA_CERTIFICATES_MERGE_PROGRESS_EVERY', 100)
+MERGE_PROGRESS_INTERVAL = getattr(settings, 'NAVOICA_CERTIFICATES_MERGE_PROGRESS_INTERVAL', 5)
+MERGE_SPOOL_MAX_SIZE = getattr(settings, 'NAVOICA_CERTIFICATES_MERGE_SPOOL_MAX_SIZE', 1024 * 1024)
+MERGE_PATHS_CHUNK_SIZE = 500
+CERTIFICATES_TEMPLATE_VERSION = getattr(settings, 'NAVOICA_CERTIFICATES_TEMPLATE_VERSION', '')
+
+def normalize_certificate_html(html):
+    """
+    Return normalized HTML of the certificate and sha256 digest of its content.
 
+    CSRF tokens are removed and whitespace is collapsed for the digest, so renders of
+    the same certificate data have the same digest. NAVOICA_CERTIFICATES_TEMPLATE_VERSION
+    is a part of the digest, changing it stops the reuse of PDFs rendered before, e.g. when
+    fonts or stylesheets linked by the certificate template changed.
+    """
     soup = BeautifulSoup(html, "html.parser")
+    for csrf_input in soup.find_all('input', attrs={'name': 'csrfmiddlewaretoken'}):
+        csrf_input.decompose()
 
     html = str(soup)
+    content = ' '.join(html.split())
+    if CERTIFICATES_TEMPLATE_VERSION:
+        content = u"{} {}".format(CERTIFICATES_TEMPLATE_VERSION, content)
+    digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+    return html, digest
+
+
+def find_certificate_pdf(digest):
+    """
+    Return storage path of the PDF rendered earlier from HTML with the digest, if it still exists.
+    """
+    pdf_digest = CertificatePdfDigest.objects.filter(digest=digest).first()
+    if pdf_digest is not None and default_storage.exists(pdf_digest.path):
+        return pdf_digest.path
+    return None
+
+
+def record_certificate_pdf(digest, path):
+    CertificatePdfDigest.objects.update_or_create(digest=digest, defaults={'path': path})
+
+
+def convert_certificate_pdf(html, certificate_pk=None):
+    """
+    Convert normalized HTML of the certificate to PDF saved in the storage.
+
+    Returns:
+        storage path of the PDF or None when the conversion failed
+
+    Raises:
+        RendererUnavailable: the renderer is paused or busy, the render should be deferred
+    """
     log.info(
         "Cert [PDF]: {}".format(html)
     )
 
-    multipart_form_data = {
-        'file': ('index.html', html),
-        'marginTop': (None, '0',),
-        'marginBottom': (None, '0',),
-        'marginLeft': (None, '0',),
-        'marginRight': (None, '0',),
-        'landscape': (None, 'true',),
-    }
-
-    # $ docker run --rm -p 3000:3000 thecodingmachine/gotenberg:5
-    r = requests.post(settings.GOTENBERG_URL + 'convert/html', files=multipart_form_data)
-
-    if r.status_code == 200:
-        path = default_storage.save('certificates/'+str(uuid.uuid4())+'.pdf', ContentFile(r.content))
-        certificate = GeneratedCertificate.objects.get(
-            pk=certificate_pk
-        )
-        certificate.download_url = default_storage.url(path)
+    try:
+        with renderer_slot():
+            path = convert_html(html, 'certificates/' + str(uuid.uuid4()) + '.pdf')
+    except GotenbergError as error:
+        record_failure()
+        log.warning("Cert [PDF]: converting cert {} failed: {}".format(certificate_pk, error))
+        return None
+    record_success()
+    return path
+
+
+def save_certificate_pdf(html, certificate_pk=None, reuse=True):
+    """
+    Return storage path of the PDF of the certificate HTML, converted only when it was not stored yet.
+
+    With ``reuse`` False the HTML is converted again even when its PDF is stored.
+
+    Raises:
+        RendererUnavailable: the renderer is paused or busy, the render should be deferred
+    """
+    html, digest = normalize_certificate_html(html)
+    path = find_certificate_pdf(digest) if reuse else None
+    if path is not None:
+        log.info("Cert [PDF]: reusing {} for cert {}".format(path, certificate_pk))
+        return path
+
+    path = convert_certificate_pdf(html, certificate_pk)
+    if path is not None:
+        record_certificate_pdf(digest, path)
+    return path
+
+
+def render_pdf(html, certificate_pk):
+    path = save_certificate_pdf(html, certificate_pk)
+    if path is None:
+        return None
+
+    certificate = GeneratedCertificate.objects.get(
+        pk=certificate_pk
+    )
+    certificate.download_url = default_storage.url(path)
+    with transaction.atomic():
         certificate.save(update_fields=['download_url'])
-        return certificate
+        GeneratedCertificatePdf.objects.update_or_create(certificate_id=certificate.pk, defaults={'path': path})
+    return certificate
+
+
+def save_rendered_pdfs(certificates, paths):
+    """
+    Save download_url of rendered certificates and their storage paths in one transaction.
+    """
+    with transaction.atomic():
+        GeneratedCertificate.objects.bulk_update(certificates, ['download_url'])
+        GeneratedCertificatePdf.objects.filter(certificate_id__in=paths.keys()).delete()
+        GeneratedCertificatePdf.objects.bulk_create([
+            GeneratedCertificatePdf(certificate_id=certificate_pk, path=path)
+            for certificate_pk, path in paths.items()
+        ])
+
+
+def render_pdfs(certificate_pks, parallelism=RENDER_BATCH_PARALLELISM, rerender=False):
+    """
+    Render PDFs of the chunk of certificates and save their download_url with one query.
+
+    With ``rerender`` certificates with download_url are rendered again too, without
+    reusing stored PDFs, the new download_url values replace the old ones in one transaction.
+
+    HTML of certificates is rendered one by one in the current thread, PDFs already
+    stored for the same HTML are reused and other conversions to PDF are sent to
+    Gotenberg by at most ``parallelism`` threads at once. Certificates
+    with download_url, not downloadable or not viewable in the course are skipped.
+
+    Returns:
+        tuple (list of rendered certificates, list of pks of failed certificates,
+        list of pks of certificates deferred because the renderer is unavailable)
+    """
+    certificates = GeneratedCertificate.objects.filter(
+        pk__in=certificate_pks,
+        status=CertificateStatuses.downloadable,
+    ).order_by('pk')
+    if not rerender:
+        certificates = certificates.filter(download_url='')
+
+    viewable_courses = {}
+    paths = {}
+    rendered = []
+    failed = []
+    deferred = []
+    try:
+        with ThreadPoolExecutor(max_workers=parallelism) as executor:
+            conversions = {}
+            for certificate in certificates:
+                if certificate.course_id not in viewable_courses:
+                    course = CourseOverview.objects.get(pk=certificate.course_id)
+                    viewable_courses[certificate.course_id] = certificates_viewable_for_course(course)
+                if not viewable_courses[certificate.course_id]:
+                    continue
+                if is_circuit_open():
+                    deferred.append(certificate.pk)
+                    continue
+
+                try:
+                    html = get_certificate_html(certificate)
+                    if html is not None:
+                        html, digest = normalize_certificate_html(html)
+                        path = find_certificate_pdf(digest) if not rerender else None
+                except Exception:  # pylint: disable=broad-except
+                    log.exception("Cert [PDF]: rendering HTML of cert {} failed".format(certificate.pk))
+                    html = None
+                if html is None:
+                    failed.append(certificate.pk)
+                    continue
+                if path is not None:
+                    certificate.download_url = default_storage.url(path)
+                    paths[certificate.pk] = path
+                    rendered.append(certificate)
+                    continue
+                conversion = executor.submit(convert_certificate_pdf, html, certificate.pk)
+                conversions[conversion] = (certificate, digest)
+
+            for conversion in as_completed(conversions):
+                certificate, digest = conversions[conversion]
+                try:
+                    path = conversion.result()
+                    if path is not None:
+                        record_certificate_pdf(digest, path)
+                except RendererUnavailable:
+                    deferred.append(certificate.pk)
+                    continue
+                except Exception:  # pylint: disable=broad-except
+                    log.exception("Cert [PDF]: converting cert {} failed".format(certificate.pk))
+                    path = None
+                if path is None:
+                    failed.append(certificate.pk)
+                    continue
+                certificate.download_url = default_storage.url(path)
+                paths[certificate.pk] = path
+                rendered.append(certificate)
+    finally:
+        # certificates rendered before an unexpected error are saved too
+        save_rendered_pdfs(rendered, paths)
+    return rendered, failed, deferred
+
+
+def iter_concurrently(fn, items, parallelism):
+    """
+    Yield (item, fn(item)) pairs computed by at most ``parallelism`` threads, in order of completion.
+
+    At most twice ``parallelism`` items are submitted at once, so items are consumed lazily.
+    """
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=parallelism) as executor:
+        pending = {executor.submit(fn, item): item for item in itertools.islice(items, parallelism * 2)}
+        while pending:
+            done, _not_done = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                for next_item in itertools.islice(items, 1):
+                    pending[executor.submit(fn, next_item)] = next_item
+                yield item, future.result()
+
+
+def fetch_certificate_pdf(download_url, path=None):
+    """
+    Copy the certificate PDF in chunks to a spooled temporary file.
+
+    The PDF is read from the storage when its path is known and matches download_url,
+    otherwise (or when reading fails) it is downloaded from download_url.
+
+    Returns:
+        the file positioned at the start or None when the PDF was not read
+    """
+    pdf = tempfile.SpooledTemporaryFile(max_size=MERGE_SPOOL_MAX_SIZE)
+    if path and urlparse(download_url).path.endswith(path):
+        try:
+            with default_storage.open(path, 'rb') as stored_pdf:
+                shutil.copyfileobj(stored_pdf, pdf, GOTENBERG_CHUNK_SIZE)
+            pdf.seek(0)
+            return pdf
+        except Exception as error:  # pylint: disable=broad-except
+            # storage backends raise their own errors, e.g. botocore ClientError
+            log.warning("Merge certificates: reading {} failed: {}".format(path, error))
+            pdf.seek(0)
+            pdf.truncate()
+
+    try:
+        with get_session().get(download_url, timeout=get_timeout(), stream=True) as response:
+            if response.status_code != 200:
+                pdf.close()
+                return None
+            for chunk in response.iter_content(GOTENBERG_CHUNK_SIZE):
+                pdf.write(chunk)
+    except requests.RequestException as error:
+        log.warning("Merge certificates: downloading {} failed: {}".format(download_url, error))
+        pdf.close()
+        return None
+    pdf.seek(0)
+    return pdf
+
+
+def storage_path_from_url(download_url):
+    """
+    Return storage path of the certificate PDF saved in the default storage under download_url or None.
+
+    Used for certificates rendered before their storage paths were recorded, the path
+    is taken from the ``certificates/`` part of the URL and accepted only when the
+    storage gives the same URL for it.
+    """
+    url_path = urlparse(download_url).path
+    index = url_path.rfind('/certificates/')
+    if index < 0:
+        return None
+    path = unquote(url_path[index + 1:])
+    try:
+        if urlparse(default_storage.url(path)).path != url_path:
+            return None
+    except Exception:  # pylint: disable=broad-except
+        return None
+    return path
+
+
+def iter_merged_certificates(certificates, chunk_size=MERGE_PATHS_CHUNK_SIZE):
+    """
+    Yield (verify_uuid, download_url, storage path or None) of certificates.
+
+    Storage paths are read with one query per chunk of certificates, paths of
+    certificates without recorded path are derived from download_url.
+    """
+    rows = certificates.values_list('pk', 'verify_uuid', 'download_url').iterator()
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        paths = dict(GeneratedCertificatePdf.objects.filter(
+            certificate_id__in=[certificate_pk for certificate_pk, _verify_uuid, _download_url in chunk]
+        ).values_list('certificate_id', 'path'))
+        for certificate_pk, verify_uuid, download_url in chunk:
+            yield verify_uuid, download_url, paths.get(certificate_pk) or storage_path_from_url(download_url)
 
 
 def merging_all_course_certificates(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
@@ -62,44 +346,115 @@ def merging_all_course_certificates(_xmodule_instance_args, _entry_id, course_id
     current_step = {'step': _('Merging Certificates')}
     task_progress.update_task_state(extra_meta=current_step)
 
-    base_tmp = "/tmp/certificates/"
-    path_tmp = base_tmp+str(course_id)+"/"
+    def fetch(certificate):
+        _verify_uuid, download_url, path = certificate
+        return fetch_certificate_pdf(download_url, path)
 
-    try:
-        os.makedirs(path_tmp)
-    except OSError:
-        pass
-
-    # Download certificate for each student
-    for certificate in certificates:
-        task_progress.attempted += 1
-        current_step = {'step': certificate.verify_uuid}
-
-        r = requests.get(certificate.download_url)
-        if r.status_code == 200:
-            with open(path_tmp+certificate.verify_uuid+".pdf", 'wb') as f:
-                f.write(r.content)
-            task_progress.succeeded += 1
-        else:
-            task_progress.failed += 1
+    with tempfile.TemporaryFile() as archive:
+        # Download certificate for each student and append it to the ZIP archive as it arrives,
+        # progress is saved every MERGE_PROGRESS_EVERY certificates or MERGE_PROGRESS_INTERVAL seconds
+        last_progress_time = time()
+        certificates = iter_merged_certificates(certificates)
+        with zipfile.ZipFile(archive, 'w', zipfile.ZIP_STORED) as zf:
+            for (verify_uuid, _download_url, _path), pdf in iter_concurrently(fetch, certificates, MERGE_PARALLELISM):
+                task_progress.attempted += 1
+                if pdf is not None:
+                    with pdf, zf.open(verify_uuid + ".pdf", 'w') as entry:
+                        shutil.copyfileobj(pdf, entry, GOTENBERG_CHUNK_SIZE)
+                    task_progress.succeeded += 1
+                else:
+                    task_progress.failed += 1
+
+                if (task_progress.attempted % MERGE_PROGRESS_EVERY == 0 or
+                        time() - last_progress_time >= MERGE_PROGRESS_INTERVAL):
+                    task_progress.update_task_state(extra_meta={'step': verify_uuid})
+                    last_progress_time = time()
+
+        cert_generated_history, created = CertificateGenerationMergeHistory.objects.get_or_create(
+            instructor_task=InstructorTask.objects.get(task_id=_xmodule_instance_args['task_id']),
+        )
+        cert_generated_history.course_id = str(course_id)
+        cert_generated_history.save()
 
+        current_step = {'step': _('Packing all certificates to ZIP archive')}
         task_progress.update_task_state(extra_meta=current_step)
 
-    cert_generated_history, created = CertificateGenerationMergeHistory.objects.get_or_create(
+        archive.seek(0)
+        cert_generated_history.pdf.save(str(course_id)+'.zip', File(archive))
+        cert_generated_history.save()
+
+    return task_progress.update_task_state(extra_meta=current_step)
+
+
+def write_roster(rows, fields, output_format, fh):
+    """
+    Write serialized certificates to the binary file in the given format.
+
+    Args:
+        rows: iterable of serialized certificates (dicts with given fields).
+        fields: list of names of columns.
+        output_format: one of CertificateRosterExport.OUTPUT_FORMAT_CHOICES.
+        fh: binary file object.
+    """
+    if output_format == CertificateRosterExport.XLSX:
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(fields)
+        for row in rows:
+            sheet.append([row[field] for field in fields])
+        workbook.save(fh)
+        return
+
+    text_fh = io.TextIOWrapper(fh, encoding='utf-8', newline='')
+    if output_format == CertificateRosterExport.NDJSON:
+        for row in rows:
+            text_fh.write(json.dumps(row) + '\n')
+    else:
+        writer = csv.writer(text_fh)
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow([row[field] for field in fields])
+    text_fh.flush()
+    text_fh.detach()
+
+
+def exporting_certificates_roster(_xmodule_instance_args, _entry_id, course_id, task_input, action_name):
+
+    start_time = time()
+
+    certificates = GeneratedCertificate.eligible_certificates.filter(
+        course_id=course_id
+    ).select_related('user', 'user__profile').order_by('pk')
+
+    task_progress = TaskProgress(action_name, certificates.count(), start_time)
+
+    current_step = {'step': _('Exporting certificates roster')}
+    task_progress.update_task_state(extra_meta=current_step)
+
+    output_format = task_input.get('output_format', CertificateRosterExport.CSV)
+    roster_export, created = CertificateRosterExport.objects.get_or_create(
         instructor_task=InstructorTask.objects.get(task_id=_xmodule_instance_args['task_id']),
+        defaults={'course_id': course_id, 'output_format': output_format},
     )
-    cert_generated_history.course_id = str(course_id)
-    cert_generated_history.save()
+    fields = list(GeneratedCertificateSerializer().fields.keys())
 
-    current_step = {'step': _('Compressing all certificates to ZIP archive')}
-    task_progress.update_task_state(extra_meta=current_step)
+    def serialized_certificates():
+        for certificate in certificates.iterator(chunk_size=ROSTER_EXPORT_CHUNK_SIZE):
+            task_progress.attempted += 1
+            task_progress.succeeded += 1
+            if task_progress.attempted % ROSTER_EXPORT_CHUNK_SIZE == 0:
+                task_progress.update_task_state(extra_meta=current_step)
+            yield GeneratedCertificateSerializer(certificate).data
 
-    make_archive(base_tmp+str(course_id), 'zip', root_dir=path_tmp, base_dir=None)
+    with tempfile.TemporaryFile() as fh:
+        write_roster(serialized_certificates(), fields, output_format, fh)
+        fh.seek(0)
 
-    fh = open(base_tmp+str(course_id)+'.zip', "rb")
-    if fh:
-        file_content = ContentFile(fh.read())
-        cert_generated_history.pdf.save(str(course_id)+'.zip', file_content)
-        cert_generated_history.save()
+        current_step = {'step': _('Saving certificates roster')}
+        task_progress.update_task_state(extra_meta=current_step)
+        roster_export.file.save("{}.{}".format(str(course_id), output_format), File(fh), save=False)
+        roster_export.save(update_fields=['file', 'modified'])
 
     return task_progress.update_task_state(extra_meta=current_step)
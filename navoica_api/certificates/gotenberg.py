@@ -0,0 +1,110 @@
+"""
+Client of the Gotenberg service converting certificate HTML to PDF.
+
+Requests go through one keep-alive session per process with a bounded connection
+pool, timeouts and retries with backoff. Converted PDFs are streamed from the
+response into the storage through a spooled temporary file, so the whole PDF is
+not kept in memory.
+"""
+import tempfile
+from threading import Lock
+
+import requests
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+GOTENBERG_CONNECT_TIMEOUT = getattr(settings, 'NAVOICA_GOTENBERG_CONNECT_TIMEOUT', 5)
+GOTENBERG_READ_TIMEOUT = getattr(settings, 'NAVOICA_GOTENBERG_READ_TIMEOUT', 60)
+GOTENBERG_POOL_SIZE = getattr(settings, 'NAVOICA_GOTENBERG_POOL_SIZE', 10)
+GOTENBERG_RETRIES = getattr(settings, 'NAVOICA_GOTENBERG_RETRIES', 3)
+GOTENBERG_BACKOFF_FACTOR = getattr(settings, 'NAVOICA_GOTENBERG_BACKOFF_FACTOR', 0.5)
+GOTENBERG_CHUNK_SIZE = 64 * 1024
+GOTENBERG_SPOOL_MAX_SIZE = getattr(settings, 'NAVOICA_GOTENBERG_SPOOL_MAX_SIZE', 5 * 1024 * 1024)
+
+RETRY_STATUSES = (502, 503, 504)
+
+PDF_OPTIONS = {
+    'marginTop': (None, '0',),
+    'marginBottom': (None, '0',),
+    'marginLeft': (None, '0',),
+    'marginRight': (None, '0',),
+    'landscape': (None, 'true',),
+}
+
+_session = None
+_session_lock = Lock()
+
+
+class GotenbergError(Exception):
+    """
+    Gotenberg did not convert the document.
+    """
+
+
+def _retry():
+    retry_kwargs = {
+        'total': GOTENBERG_RETRIES,
+        'backoff_factor': GOTENBERG_BACKOFF_FACTOR,
+        'status_forcelist': RETRY_STATUSES,
+        'raise_on_status': False,
+    }
+    methods = frozenset(['GET', 'POST'])
+    try:
+        return Retry(allowed_methods=methods, **retry_kwargs)
+    except TypeError:
+        # urllib3 < 1.26
+        return Retry(method_whitelist=methods, **retry_kwargs)
+
+
+def get_session():
+    """
+    Return the requests session of the process shared by certificate renders.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=GOTENBERG_POOL_SIZE,
+                                      max_retries=_retry(), pool_block=True)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+
+def get_timeout():
+    return GOTENBERG_CONNECT_TIMEOUT, GOTENBERG_READ_TIMEOUT
+
+
+def convert_html(html, path):
+    """
+    Convert the HTML document to PDF and save it in the default storage.
+
+    Arguments:
+        html: HTML document (str)
+        path: requested storage path of the PDF
+
+    Returns:
+        path of the saved PDF
+
+    Raises:
+        GotenbergError: the conversion failed
+    """
+    files = dict(PDF_OPTIONS, file=('index.html', html))
+    try:
+        # $ docker run --rm -p 3000:3000 thecodingmachine/gotenberg:5
+        with get_session().post(settings.GOTENBERG_URL + 'convert/html', files=files,
+                                timeout=get_timeout(), stream=True) as response:
+            if response.status_code != 200:
+                raise GotenbergError('Gotenberg responded with status {}'.format(response.status_code))
+            with tempfile.SpooledTemporaryFile(max_size=GOTENBERG_SPOOL_MAX_SIZE) as pdf:
+                for chunk in response.iter_content(GOTENBERG_CHUNK_SIZE):
+                    pdf.write(chunk)
+                pdf.seek(0)
+                return default_storage.save(path, File(pdf))
+    except requests.RequestException as error:
+        raise GotenbergError(str(error))
@@ -0,0 +1,101 @@
+"""
+HTML of certificates converted to PDF.
+
+The HTML is rendered in the worker process by the LMS certificate view called with
+a synthetic request, so renders do not go through the load balancer and the web
+tier. The HTTP request to the LMS is used when the in-process render is disabled
+or fails.
+"""
+import logging
+from time import time
+from urllib.parse import urlparse
+
+import requests
+from crum import get_current_request, set_current_request
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sites.shortcuts import get_current_site
+from django.test import RequestFactory
+from django.urls import reverse
+
+from navoica_api.certificates.gotenberg import get_session, get_timeout
+
+log = logging.getLogger(__name__)
+
+RENDER_HTML_IN_PROCESS = getattr(settings, 'NAVOICA_CERTIFICATES_RENDER_HTML_IN_PROCESS', True)
+
+
+def certificate_html_path(certificate):
+    return reverse('certificates:render_cert_by_uuid', args=[certificate.verify_uuid])
+
+
+def render_certificate_html(certificate):
+    """
+    Render HTML of the certificate with the LMS certificate view in the current process.
+
+    Returns:
+        HTML (bytes) or None when the view did not respond with 200
+    """
+    from lms.djangoapps.certificates.views.webview import render_cert_by_uuid
+
+    lms_root_url = urlparse(settings.LMS_ROOT_URL)
+    request = RequestFactory().get(
+        certificate_html_path(certificate),
+        HTTP_HOST=lms_root_url.netloc,
+        secure=lms_root_url.scheme == 'https',
+    )
+    request.user = AnonymousUser()
+    request.session = {}
+    request.site = get_current_site(request)
+
+    previous_request = get_current_request()
+    set_current_request(request)
+    try:
+        response = render_cert_by_uuid(request, certificate.verify_uuid)
+    finally:
+        set_current_request(previous_request)
+
+    if response.status_code != 200:
+        return None
+    return response.content
+
+
+def fetch_certificate_html(certificate):
+    """
+    Fetch HTML of the certificate from the LMS.
+
+    Returns:
+        HTML (bytes) or None when the LMS did not respond with 200
+    """
+    try:
+        response = get_session().get("{}{}".format(settings.LMS_ROOT_URL, certificate_html_path(certificate)),
+                                     timeout=get_timeout())
+    except requests.RequestException as error:
+        log.warning("Cert [HTML]: fetching cert {} failed: {}".format(certificate.pk, error))
+        return None
+    if response.status_code != 200:
+        return None
+    return response.content
+
+
+def get_certificate_html(certificate):
+    """
+    Return HTML of the certificate rendered in-process, fetched from the LMS as a fallback.
+    """
+    if RENDER_HTML_IN_PROCESS:
+        start_time = time()
+        try:
+            html = render_certificate_html(certificate)
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Cert [HTML]: rendering cert {} in-process failed".format(certificate.pk))
+            html = None
+        if html is not None:
+            log.info("Cert [HTML]: cert {} rendered in-process in {:.3f}s".format(
+                certificate.pk, time() - start_time))
+            return html
+
+    start_time = time()
+    html = fetch_certificate_html(certificate)
+    if html is not None:
+        log.info("Cert [HTML]: cert {} fetched from LMS in {:.3f}s".format(certificate.pk, time() - start_time))
+    return html
@@ -0,0 +1,212 @@
+"""
+Cluster-wide concurrency limit and circuit breaker of the PDF renderer (Gotenberg).
+
+Calls to the renderer take one of NAVOICA_CERTIFICATES_RENDERER_MAX_IN_FLIGHT slots
+kept in the shared cache. A slot is owned by the call that took it and expires after
+the longest possible call with all retries, so slots of killed workers are released.
+
+Results of calls are counted in time buckets of a sliding window. The circuit is
+opened when at least RENDERER_MIN_CALLS calls were made in the window and the share
+of failed ones reaches RENDERER_FAILURE_RATIO; render tasks are deferred while it is
+open. After the pause the circuit is half-open: a single probe call is let through,
+its success closes the circuit and its failure opens it again.
+"""
+import random
+from contextlib import contextmanager
+from time import sleep, time
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+
+from navoica_api.certificates.gotenberg import (
+    GOTENBERG_BACKOFF_FACTOR, GOTENBERG_CONNECT_TIMEOUT, GOTENBERG_READ_TIMEOUT, GOTENBERG_RETRIES)
+
+RENDERER_MAX_IN_FLIGHT = getattr(settings, 'NAVOICA_CERTIFICATES_RENDERER_MAX_IN_FLIGHT', 8)
+# every attempt of the call with backoffs between them and the time of saving the PDF
+RENDERER_SLOT_TIMEOUT = int(
+    (GOTENBERG_RETRIES + 1) * (GOTENBERG_CONNECT_TIMEOUT + GOTENBERG_READ_TIMEOUT) +
+    GOTENBERG_BACKOFF_FACTOR * 2 ** GOTENBERG_RETRIES +
+    getattr(settings, 'NAVOICA_CERTIFICATES_RENDERER_STORAGE_TIMEOUT', 30)
+)
+RENDERER_ACQUIRE_TIMEOUT = getattr(settings, 'NAVOICA_CERTIFICATES_RENDERER_ACQUIRE_TIMEOUT', 10)
+RENDERER_FAILURE_RATIO = getattr(settings, 'NAVOICA_CERTIFICATES_RENDERER_FAILURE_RATIO', 0.5)
+RENDERER_MIN_CALLS = getattr(settings, 'NAVOICA_CERTIFICATES_RENDERER_MIN_CALLS', 10)
+RENDERER_FAILURE_WINDOW = getattr(settings, 'NAVOICA_CERTIFICATES_RENDERER_FAILURE_WINDOW', 60)
+RENDERER_WINDOW_BUCKETS = 6
+RENDERER_PAUSE = getattr(settings, 'NAVOICA_CERTIFICATES_RENDERER_PAUSE', 60)
+
+CACHE_PREFIX = 'navoica_api.certificates.renderer'
+CIRCUIT_OPEN_CACHE_KEY = CACHE_PREFIX + '.circuit_open'
+CIRCUIT_TRIPPED_CACHE_KEY = CACHE_PREFIX + '.circuit_tripped'
+PROBE_CACHE_KEY = CACHE_PREFIX + '.probe'
+QUEUED_CACHE_KEY = CACHE_PREFIX + '.queued'
+REJECTED_CACHE_KEY = CACHE_PREFIX + '.rejected'
+
+
+class RendererUnavailable(Exception):
+    """
+    The renderer is paused by the circuit breaker or all its slots are taken.
+    """
+
+
+def _slot_cache_key(index):
+    return u"{}.slot.{}".format(CACHE_PREFIX, index)
+
+
+def _incr(cache_key, delta=1, timeout=None):
+    cache.add(cache_key, 0, timeout)
+    try:
+        return cache.incr(cache_key, delta)
+    except ValueError:
+        return None
+
+
+def _release(cache_key, token):
+    """
+    Delete the cache key only when it still keeps the token, so a key expired and taken
+    by another call is not released.
+    """
+    if cache.get(cache_key) == token:
+        cache.delete(cache_key)
+
+
+def _bucket_length():
+    return max(1, RENDERER_FAILURE_WINDOW // RENDERER_WINDOW_BUCKETS)
+
+
+def _window_cache_keys(name):
+    bucket_length = _bucket_length()
+    current_bucket = int(time()) // bucket_length
+    number_of_buckets = -(-RENDERER_FAILURE_WINDOW // bucket_length)
+    return [
+        u"{}.{}.{}".format(CACHE_PREFIX, name, bucket)
+        for bucket in range(current_bucket - number_of_buckets + 1, current_bucket + 1)
+    ]
+
+
+def _window_counts():
+    """
+    Return numbers of (calls, failed calls) in the sliding window.
+    """
+    calls_keys, failures_keys = _window_cache_keys('calls'), _window_cache_keys('failures')
+    counters = cache.get_many(calls_keys + failures_keys)
+    return (
+        sum(counters.get(key, 0) for key in calls_keys),
+        sum(counters.get(key, 0) for key in failures_keys),
+    )
+
+
+def _count_call(failed):
+    timeout = RENDERER_FAILURE_WINDOW + _bucket_length()
+    _incr(_window_cache_keys('calls')[-1], timeout=timeout)
+    if failed:
+        _incr(_window_cache_keys('failures')[-1], timeout=timeout)
+
+
+def _open_circuit():
+    cache.set(CIRCUIT_TRIPPED_CACHE_KEY, True, None)
+    cache.set(CIRCUIT_OPEN_CACHE_KEY, True, RENDERER_PAUSE)
+
+
+def is_circuit_open():
+    return bool(cache.get(CIRCUIT_OPEN_CACHE_KEY))
+
+
+def is_circuit_half_open():
+    return not is_circuit_open() and bool(cache.get(CIRCUIT_TRIPPED_CACHE_KEY))
+
+
+def record_success():
+    if is_circuit_half_open():
+        cache.delete_many([CIRCUIT_TRIPPED_CACHE_KEY] + _window_cache_keys('calls') + _window_cache_keys('failures'))
+        return
+    _count_call(failed=False)
+
+
+def record_failure():
+    if is_circuit_half_open():
+        _open_circuit()
+        return
+    _count_call(failed=True)
+    calls, failures = _window_counts()
+    if calls >= RENDERER_MIN_CALLS and failures >= calls * RENDERER_FAILURE_RATIO:
+        _open_circuit()
+
+
+def _acquire_slot(token):
+    indexes = list(range(RENDERER_MAX_IN_FLIGHT))
+    random.shuffle(indexes)
+    for index in indexes:
+        if cache.add(_slot_cache_key(index), token, RENDERER_SLOT_TIMEOUT):
+            return index
+    return None
+
+
+@contextmanager
+def renderer_slot(timeout=RENDERER_ACQUIRE_TIMEOUT):
+    """
+    Take a slot of the renderer for the call, waiting at most ``timeout`` seconds for it.
+
+    When the circuit is half-open only the call which takes the probe gets a slot.
+
+    Raises:
+        RendererUnavailable: the circuit is open or no slot was released in time
+    """
+    token = uuid4().hex
+    probe = False
+    deadline = time() + timeout
+    while True:
+        if is_circuit_open():
+            _incr(REJECTED_CACHE_KEY)
+            raise RendererUnavailable('Renderer is paused by the circuit breaker')
+        if is_circuit_half_open():
+            probe = cache.add(PROBE_CACHE_KEY, token, RENDERER_SLOT_TIMEOUT)
+            if not probe:
+                _incr(REJECTED_CACHE_KEY)
+                raise RendererUnavailable('Renderer is probed by another call')
+        index = _acquire_slot(token)
+        if index is not None:
+            break
+        if probe:
+            _release(PROBE_CACHE_KEY, token)
+            probe = False
+        if time() >= deadline:
+            _incr(REJECTED_CACHE_KEY)
+            raise RendererUnavailable('All renderer slots are taken')
+        sleep(0.2)
+
+    try:
+        yield
+    finally:
+        _release(_slot_cache_key(index), token)
+        if probe:
+            _release(PROBE_CACHE_KEY, token)
+
+
+def add_queued(number):
+    _incr(QUEUED_CACHE_KEY, number)
+
+
+def remove_queued(number):
+    if (_incr(QUEUED_CACHE_KEY, -number) or 0) < 0:
+        cache.set(QUEUED_CACHE_KEY, 0, None)
+
+
+def get_renderer_status():
+    """
+    Return counters of the renderer for monitoring.
+    """
+    slots = cache.get_many([_slot_cache_key(index) for index in range(RENDERER_MAX_IN_FLIGHT)])
+    counters = cache.get_many([QUEUED_CACHE_KEY, REJECTED_CACHE_KEY])
+    calls, failures = _window_counts()
+    return {
+        'in_flight': len(slots),
+        'max_in_flight': RENDERER_MAX_IN_FLIGHT,
+        'queued': counters.get(QUEUED_CACHE_KEY, 0),
+        'rejected': counters.get(REJECTED_CACHE_KEY, 0),
+        'calls': calls,
+        'failures': failures,
+        'circuit_open': is_circuit_open(),
+        'circuit_half_open': is_circuit_half_open(),
+    }
@@ -0,0 +1,99 @@
+"""
+Denormalized roster of eligible generated certificates (CertificateRosterEntry).
+"""
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from lms.djangoapps.certificates.models import GeneratedCertificate
+
+from navoica_api.api.counts import invalidate_cached_counts
+from navoica_api.models import CertificateRosterCourse, CertificateRosterEntry
+
+ROSTER_BACKFILL_CHUNK_SIZE = getattr(settings, 'NAVOICA_CERTIFICATES_ROSTER_CHUNK_SIZE', 2000)
+
+
+def normalize(value):
+    return (value or '').strip().lower()
+
+
+def roster_entry_values(certificate):
+    """
+    Return values of the roster row of the certificate with its user and profile.
+    """
+    user = certificate.user
+    try:
+        profile_name = user.profile.name
+    except ObjectDoesNotExist:
+        profile_name = ''
+    return {
+        'course_id': certificate.course_id,
+        'user_id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'profile_name': profile_name or '',
+        'username_search': normalize(user.username),
+        'email_search': normalize(user.email),
+        'profile_name_search': normalize(profile_name),
+        'created_date': certificate.created_date,
+        'grade': certificate.grade or '',
+    }
+
+
+def is_roster_populated(course_key):
+    return CertificateRosterCourse.objects.filter(course_id=course_key).exists()
+
+
+def sync_roster_entry(certificate):
+    """
+    Create, update or delete the roster row after the certificate was saved.
+    """
+    if GeneratedCertificate.eligible_certificates.filter(pk=certificate.pk).exists():
+        CertificateRosterEntry.objects.update_or_create(
+            certificate_id=certificate.pk, defaults=roster_entry_values(certificate)
+        )
+    else:
+        CertificateRosterEntry.objects.filter(certificate_id=certificate.pk).delete()
+
+
+def sync_roster_user(user):
+    CertificateRosterEntry.objects.filter(user_id=user.id).update(
+        username=user.username,
+        email=user.email,
+        username_search=normalize(user.username),
+        email_search=normalize(user.email),
+    )
+
+
+def sync_roster_profile_name(user_id, profile_name):
+    CertificateRosterEntry.objects.filter(user_id=user_id).update(
+        profile_name=profile_name or '',
+        profile_name_search=normalize(profile_name),
+    )
+
+
+def backfill_course_roster(course_key, chunk_size=ROSTER_BACKFILL_CHUNK_SIZE):
+    """
+    Rebuild roster rows of the course and mark the roster as populated.
+
+    Return:
+        number of roster rows.
+    """
+    certificates = GeneratedCertificate.eligible_certificates.filter(
+        course_id=course_key
+    ).select_related('user', 'user__profile').order_by('pk')
+
+    with transaction.atomic():
+        CertificateRosterEntry.objects.filter(course_id=course_key).delete()
+        entries = []
+        number_of_entries = 0
+        for certificate in certificates.iterator(chunk_size=chunk_size):
+            entries.append(CertificateRosterEntry(certificate_id=certificate.pk, **roster_entry_values(certificate)))
+            if len(entries) >= chunk_size:
+                CertificateRosterEntry.objects.bulk_create(entries)
+                number_of_entries += len(entries)
+                entries = []
+        CertificateRosterEntry.objects.bulk_create(entries)
+        number_of_entries += len(entries)
+        CertificateRosterCourse.objects.get_or_create(course_id=course_key)
+    invalidate_cached_counts(CertificateRosterEntry, course_key)
+    return number_of_entries
@@ -0,0 +1,89 @@
+"""
+Scheduling of certificate PDF renders after certificates are saved.
+
+Render of the certificate is scheduled at most once per version of its PDF fields,
+concurrent requests are collapsed by a short-lived lock in the shared cache keyed
+by the certificate and the digest of these fields.
+
+Certificates are rendered one by one, until many certificates of the course are
+generated at once. The burst is detected with a per-course counter in the shared
+cache, then certificates of the course are rendered by batch tasks scheduled at most
+once per burst window.
+"""
+import hashlib
+import itertools
+
+from django.conf import settings
+from django.core.cache import cache
+from lms.djangoapps.certificates.models import GeneratedCertificate
+from six import text_type
+
+from navoica_api.certificates.tasks import render_course_pdfs, render_pdf_cert_by_pk
+
+RENDER_BURST_THRESHOLD = getattr(settings, 'NAVOICA_CERTIFICATES_RENDER_BURST_THRESHOLD', 20)
+RENDER_BURST_WINDOW = getattr(settings, 'NAVOICA_CERTIFICATES_RENDER_BURST_WINDOW', 60)
+RENDER_LOCK_TIMEOUT = getattr(settings, 'NAVOICA_CERTIFICATES_RENDER_LOCK_TIMEOUT', 60 * 5)
+
+PDF_FIELDS = ('user_id', 'course_id', 'verify_uuid', 'name', 'grade', 'mode', 'status', 'download_url')
+# names and attribute names of PDF_FIELDS, both can be passed in update_fields of save()
+PDF_UPDATE_FIELDS = frozenset(itertools.chain.from_iterable(
+    (field.name, field.attname) for field in GeneratedCertificate._meta.concrete_fields
+    if field.name in PDF_FIELDS or field.attname in PDF_FIELDS
+))
+
+
+def _burst_cache_key(course_key):
+    return u"navoica_api.certificates.render_burst.{}".format(course_key)
+
+
+def _course_render_cache_key(course_key):
+    return u"navoica_api.certificates.course_render.{}".format(course_key)
+
+
+def _render_lock_cache_key(certificate):
+    return u"navoica_api.certificates.render_lock.{}.{}".format(certificate.pk, certificate_digest(certificate))
+
+
+def certificate_digest(certificate):
+    """
+    Return digest of fields of the certificate which are rendered in its PDF.
+    """
+    values = u'|'.join(text_type(getattr(certificate, field)) for field in PDF_FIELDS)
+    return hashlib.sha1(values.encode('utf-8')).hexdigest()
+
+
+def is_pdf_update(update_fields):
+    """
+    Return True if the save of the certificate with ``update_fields`` (None for all fields) can change its PDF.
+    """
+    return not update_fields or not PDF_UPDATE_FIELDS.isdisjoint(update_fields)
+
+
+def is_render_burst(course_key):
+    """
+    Count the render request of the course and return True when the course has a burst of them.
+    """
+    cache_key = _burst_cache_key(course_key)
+    cache.add(cache_key, 0, RENDER_BURST_WINDOW)
+    try:
+        number_of_renders = cache.incr(cache_key)
+    except ValueError:
+        return False
+    return number_of_renders > RENDER_BURST_THRESHOLD
+
+
+def schedule_certificate_render(certificate):
+    """
+    Render the certificate by itself or with other certificates of the course during bursts.
+
+    Returns:
+        False when the render of this version of the certificate is already scheduled
+    """
+    if not cache.add(_render_lock_cache_key(certificate), True, RENDER_LOCK_TIMEOUT):
+        return False
+
+    if not is_render_burst(certificate.course_id):
+        render_pdf_cert_by_pk.delay(certificate.pk)
+    elif cache.add(_course_render_cache_key(certificate.course_id), True, RENDER_BURST_WINDOW):
+        render_course_pdfs.apply_async(args=[text_type(certificate.course_id)], countdown=RENDER_BURST_WINDOW)
+    return True
@@ -1,19 +1,34 @@
 import logging
 
-from django.db.models.signals import post_save, pre_save
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from lms.djangoapps.certificates.models import GeneratedCertificate
-from common.djangoapps.student.models import CourseEnrollment
+from lms.djangoapps.certificates.models import CertificateStatuses, GeneratedCertificate
+from common.djangoapps.student.models import CourseEnrollment, UserProfile
 
-from navoica_api.certificates.tasks import render_pdf_cert_by_pk
+from navoica_api.certificates.roster import sync_roster_entry, sync_roster_profile_name, sync_roster_user
+from navoica_api.certificates.scheduling import is_pdf_update, schedule_certificate_render
+from navoica_api.models import CertificateRosterEntry
 
 TASK_LOG = logging.getLogger('navoica_api.certificates')
 
+ROSTER_CERTIFICATE_FIELDS = {'user', 'course_id', 'status', 'grade', 'mode', 'created_date'}
+ROSTER_USER_FIELDS = {'username', 'email'}
+
 
 @receiver(post_save, sender=GeneratedCertificate, dispatch_uid="navoica_api_update_cert_signal")
-def update_cert(sender, instance, **kwargs):
-    TASK_LOG.info("Certificates Signal: Generating pdf for cert {}".format(instance.pk))
-    render_pdf_cert_by_pk.delay(instance.pk)
+def update_cert(sender, instance, update_fields=None, **kwargs):
+    if not is_pdf_update(update_fields):
+        return
+    if instance.download_url or instance.status != CertificateStatuses.downloadable:
+        return
+
+    def schedule_render():
+        if schedule_certificate_render(instance):
+            TASK_LOG.info("Certificates Signal: Generating pdf for cert {}".format(instance.pk))
+
+    transaction.on_commit(schedule_render)
 
 
 @receiver(pre_save, sender=CourseEnrollment, dispatch_uid="navoica_api_update_course_enrollment")
@@ -21,3 +36,29 @@ def update_course_enrollment(sender, instance, **kwargs):
     if instance.mode != 'honor':
         TASK_LOG.info("Course Enrollment Signal: changing mode to honor instead of {}".format(instance.mode))
         instance.mode = 'honor'
+
+
+@receiver(post_save, sender=GeneratedCertificate, dispatch_uid="navoica_api_update_cert_roster_signal")
+def update_cert_roster(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not ROSTER_CERTIFICATE_FIELDS.intersection(update_fields):
+        return
+    sync_roster_entry(instance)
+
+
+@receiver(post_delete, sender=GeneratedCertificate, dispatch_uid="navoica_api_delete_cert_roster_signal")
+def delete_cert_roster(sender, instance, **kwargs):
+    CertificateRosterEntry.objects.filter(certificate_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=User, dispatch_uid="navoica_api_update_user_roster_signal")
+def update_user_roster(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not ROSTER_USER_FIELDS.intersection(update_fields):
+        return
+    sync_roster_user(instance)
+
+
+@receiver(post_save, sender=UserProfile, dispatch_uid="navoica_api_update_profile_roster_signal")
+def update_profile_roster(sender, instance, update_fields=None, **kwargs):
+    if update_fields and 'name' not in update_fields:
+        return
+    sync_roster_profile_name(instance.user_id, instance.name)
@@ -1,23 +1,34 @@
 import logging
 from functools import partial
+from time import time
 
-import requests
 from celery import shared_task
 from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
 from django.utils.translation import ugettext_noop
-from lms.djangoapps.certificates.models import GeneratedCertificate
+from lms.djangoapps.certificates.models import CertificateStatuses, GeneratedCertificate
 from lms.djangoapps.instructor_task.tasks_base import BaseInstructorTask
 from lms.djangoapps.instructor_task.tasks_helper.runner import run_main_task
 from lms.djangoapps.certificates.api import certificates_viewable_for_course
 from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
-from django.urls import reverse
-from navoica_api.certificates.functions import render_pdf, merging_all_course_certificates
+from navoica_api.certificates.html import get_certificate_html
+from navoica_api.certificates.renderer import RENDERER_PAUSE, RendererUnavailable, add_queued, remove_queued
+from navoica_api.certificates.functions import (
+    exporting_certificates_roster, merging_all_course_certificates, render_pdf, render_pdfs)
+from navoica_api.models import CertificateRerenderJob
+from opaque_keys.edx.keys import CourseKey
 
 TASK_LOG = logging.getLogger('edx.celery.task')
 
+RENDER_BATCH_SIZE = getattr(settings, 'NAVOICA_CERTIFICATES_RENDER_BATCH_SIZE', 50)
+
 
 @shared_task(bind=True, max_retries=3, default_retry_delay=60 * 5)
-def render_pdf_cert_by_pk(self, certificate_pk):
+def render_pdf_cert_by_pk(self, certificate_pk, deferred=False):
+    if deferred:
+        remove_queued(1)
+
     certificate = GeneratedCertificate.objects.get(
         pk=certificate_pk
     )
@@ -31,13 +42,21 @@ def render_pdf_cert_by_pk(self, certificate_pk):
             "Certificates: Generating pdf for cert {}".format(
                 certificate.pk))
 
-        r = requests.get("{}{}".format(settings.LMS_ROOT_URL, reverse('certificates:render_cert_by_uuid',
-                                                                                    args=[certificate.verify_uuid])))
+        try:
+            html = get_certificate_html(certificate)
 
-        if r.status_code == 200:
-            cert = render_pdf(html=r.content, certificate_pk=certificate_pk)
-            if cert:
-                return cert
+            if html is not None:
+                cert = render_pdf(html=html, certificate_pk=certificate_pk)
+                if cert:
+                    return cert
+        except RendererUnavailable as error:
+            TASK_LOG.info(
+                "Certificates: Deferring generating pdf for cert {}: {}".format(
+                    certificate.pk, error))
+            add_queued(1)
+            render_pdf_cert_by_pk.apply_async(args=[certificate_pk], kwargs={'deferred': True},
+                                              countdown=RENDERER_PAUSE)
+            return None
         TASK_LOG.info(
             "Certificates: Retry generating pdf for cert {}".format(
                 certificate.pk))
@@ -48,6 +67,112 @@ def render_pdf_cert_by_pk(self, certificate_pk):
                 certificate.pk))
 
 
+@shared_task
+def render_pdfs_cert_by_pks(certificate_pks, deferred=False):
+    """
+    Render PDFs of the chunk of certificates, failed ones are rendered again one by one.
+
+    Certificates deferred because the renderer is unavailable are rendered in a chunk later.
+    """
+    if deferred:
+        remove_queued(len(certificate_pks))
+
+    start_time = time()
+    rendered, failed, deferred_pks = render_pdfs(certificate_pks)
+    TASK_LOG.info(
+        "Certificates: Generated {} pdfs of {} certs in {:.1f}s, {} failed, {} deferred".format(
+            len(rendered), len(certificate_pks), time() - start_time, len(failed), len(deferred_pks)))
+    for certificate_pk in failed:
+        render_pdf_cert_by_pk.delay(certificate_pk)
+    if deferred_pks:
+        add_queued(len(deferred_pks))
+        render_pdfs_cert_by_pks.apply_async(args=[deferred_pks], kwargs={'deferred': True},
+                                            countdown=RENDERER_PAUSE)
+
+
+@shared_task
+def render_course_pdfs(course_id):
+    """
+    Render PDFs of downloadable certificates of the course without download_url in chunks.
+    """
+    certificate_pks = list(GeneratedCertificate.objects.filter(
+        course_id=CourseKey.from_string(course_id),
+        status=CertificateStatuses.downloadable,
+        download_url='',
+    ).order_by('pk').values_list('pk', flat=True))
+
+    TASK_LOG.info("Certificates: Generating pdfs for {} certs of course {}".format(len(certificate_pks), course_id))
+    for index in range(0, len(certificate_pks), RENDER_BATCH_SIZE):
+        render_pdfs_cert_by_pks.delay(certificate_pks[index:index + RENDER_BATCH_SIZE])
+
+
+@shared_task
+def rerender_course_certificates(job_id, last_pk):
+    """
+    Re-render the chunk of certificates of the job after ``last_pk`` and schedule the next one.
+
+    The checkpoint of the job is moved only when it is still ``last_pk``, so only one
+    chain of tasks continues when the job was resumed twice. The job is marked as failed
+    when the chunk raises an unexpected error, it can be resumed from the checkpoint.
+    """
+    job = CertificateRerenderJob.objects.get(pk=job_id)
+    if job.status != CertificateRerenderJob.RUNNING or job.last_pk != last_pk:
+        return
+
+    try:
+        rerender_course_certificates_chunk(job, last_pk)
+    except Exception:
+        TASK_LOG.exception("Certificates: Re-render job {} of course {} failed after certificate {}".format(
+            job_id, job.course_id, last_pk))
+        CertificateRerenderJob.objects.filter(pk=job_id, last_pk=last_pk).update(
+            status=CertificateRerenderJob.FAILED, modified=timezone.now())
+        raise
+
+
+def rerender_course_certificates_chunk(job, last_pk):
+    certificate_pks = list(GeneratedCertificate.objects.filter(
+        course_id=job.course_id,
+        status=CertificateStatuses.downloadable,
+        pk__gt=last_pk,
+    ).order_by('pk').values_list('pk', flat=True)[:job.chunk_size])
+
+    if not certificate_pks:
+        CertificateRerenderJob.objects.filter(pk=job.pk, last_pk=last_pk).update(
+            status=CertificateRerenderJob.FINISHED, modified=timezone.now())
+        TASK_LOG.info("Certificates: Re-rendered {} pdfs of course {} ({} failed), {:.2f} certs/s".format(
+            job.rendered, job.course_id, job.failed, job.throughput))
+        return
+
+    start_time = time()
+    rendered, failed, deferred = render_pdfs(certificate_pks, job.parallelism, rerender=True)
+    duration = time() - start_time
+
+    if deferred:
+        # certificates after the first deferred one are rendered again with the next chunk,
+        # they are counted then
+        next_pk = min(deferred) - 1
+        rendered = [certificate for certificate in rendered if certificate.pk <= next_pk]
+        failed = [certificate_pk for certificate_pk in failed if certificate_pk <= next_pk]
+        countdown = RENDERER_PAUSE
+    else:
+        next_pk = certificate_pks[-1]
+        countdown = max(0.0, len(certificate_pks) / job.rate - duration) if job.rate else 0
+
+    updated = CertificateRerenderJob.objects.filter(pk=job.pk, last_pk=last_pk).update(
+        last_pk=next_pk,
+        rendered=F('rendered') + len(rendered),
+        failed=F('failed') + len(failed),
+        duration=F('duration') + duration,
+        modified=timezone.now(),
+    )
+    if not updated:
+        return
+
+    TASK_LOG.info("Certificates: Re-rendered {} pdfs of course {} in {:.1f}s ({:.2f} certs/s), {} failed".format(
+        len(rendered), job.course_id, duration, len(rendered) / duration if duration else 0, len(failed)))
+    rerender_course_certificates.apply_async(args=[job.pk, next_pk], countdown=countdown)
+
+
 @shared_task(base=BaseInstructorTask, queue=settings.HIGH_PRIORITY_QUEUE)
 def merge_all_certificates(entry_id, xmodule_instance_args):
     """
@@ -62,3 +187,19 @@ def merge_all_certificates(entry_id, xmodule_instance_args):
 
     task_fn = partial(merging_all_course_certificates, xmodule_instance_args)
     return run_main_task(entry_id, task_fn, action_name)
+
+
+@shared_task(base=BaseInstructorTask, queue=settings.HIGH_PRIORITY_QUEUE)
+def export_certificates_roster(entry_id, xmodule_instance_args):
+    """
+    Write roster of generated certificates to the storage.
+    """
+    # Translators: This is a past-tense verb that is inserted into task progress messages as {action}.
+    action_name = ugettext_noop('exported')
+    TASK_LOG.info(
+        u"Task: %s, InstructorTask ID: %s, Task type: %s, Preparing for task execution",
+        xmodule_instance_args.get('task_id'), entry_id, action_name
+    )
+
+    task_fn = partial(exporting_certificates_roster, xmodule_instance_args)
+    return run_main_task(entry_id, task_fn, action_name)
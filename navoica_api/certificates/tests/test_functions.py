@@ -0,0 +1,172 @@
+"""
+Tests for rendering and merging of certificate PDFs.
+"""
+import zipfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import RequestFactory, TestCase
+from lms.djangoapps.certificates.models import CertificateStatuses, GeneratedCertificate
+from lms.djangoapps.certificates.tests.factories import GeneratedCertificateFactory
+from lms.djangoapps.courseware.tests.factories import UserFactory
+from openedx.core.djangoapps.content.course_overviews.tests.factories import CourseOverviewFactory
+
+from navoica_api.certificates.api import merge_certificates
+from navoica_api.certificates.functions import render_pdfs, save_certificate_pdf
+from navoica_api.certificates.renderer import RendererUnavailable
+from navoica_api.models import CertificateGenerationMergeHistory, GeneratedCertificatePdf
+
+CERTIFICATE_HTML = u'<html><body><p>Certificate of {}</p></body></html>'
+
+
+@mock.patch('navoica_api.certificates.functions.certificates_viewable_for_course', return_value=True)
+class RenderPdfsTest(TestCase):
+    """
+    Test for rendering PDFs of a chunk of certificates
+    """
+
+    def setUp(self):
+        super(RenderPdfsTest, self).setUp()
+        cache.clear()
+        self.course = CourseOverviewFactory()
+        with mock.patch('navoica_api.certificates.signals.handlers.transaction.on_commit'):
+            self.certificates = [
+                GeneratedCertificateFactory(
+                    user=UserFactory(),
+                    course_id=self.course.id,
+                    status=CertificateStatuses.downloadable,
+                    download_url='',
+                )
+                for _index in range(3)
+            ]
+        self.certificate_pks = [certificate.pk for certificate in self.certificates]
+
+    def render(self, convert_html, **kwargs):
+        with mock.patch('navoica_api.certificates.functions.get_certificate_html',
+                        side_effect=lambda certificate: CERTIFICATE_HTML.format(certificate.pk)), \
+                mock.patch('navoica_api.certificates.functions.convert_html', side_effect=convert_html):
+            return render_pdfs(self.certificate_pks, parallelism=2, **kwargs)
+
+    def test_rendered_certificates_are_saved(self, _viewable):
+        """
+        Test that download_url and storage paths of rendered certificates are saved
+        """
+        rendered, failed, deferred = self.render(lambda html, path: path)
+
+        self.assertEqual(sorted(certificate.pk for certificate in rendered), self.certificate_pks)
+        self.assertEqual((failed, deferred), ([], []))
+        paths = dict(GeneratedCertificatePdf.objects.values_list('certificate_id', 'path'))
+        self.assertEqual(sorted(paths), self.certificate_pks)
+        for certificate in GeneratedCertificate.objects.filter(pk__in=self.certificate_pks):
+            self.assertTrue(certificate.download_url.endswith(paths[certificate.pk]))
+
+        # certificates with download_url are skipped unless they are rerendered
+        self.assertEqual(self.render(lambda html, path: path), ([], [], []))
+        rendered, _failed, _deferred = self.render(lambda html, path: path, rerender=True)
+        self.assertEqual(len(rendered), 3)
+
+    def test_errors_of_one_certificate_dont_stop_the_chunk(self, _viewable):
+        """
+        Test that failed and deferred certificates are reported and the rendered ones are saved
+        """
+        failing_html = CERTIFICATE_HTML.format(self.certificate_pks[0])
+        deferred_html = CERTIFICATE_HTML.format(self.certificate_pks[1])
+
+        def convert_html(html, path):
+            if failing_html in html:
+                raise ValueError('Unexpected error')
+            if deferred_html in html:
+                raise RendererUnavailable('All renderer slots are taken')
+            return path
+
+        rendered, failed, deferred = self.render(convert_html)
+
+        self.assertEqual([certificate.pk for certificate in rendered], [self.certificate_pks[2]])
+        self.assertEqual(failed, [self.certificate_pks[0]])
+        self.assertEqual(deferred, [self.certificate_pks[1]])
+        self.assertEqual(
+            list(GeneratedCertificate.objects.filter(pk__in=self.certificate_pks).exclude(download_url='')
+                 .values_list('pk', flat=True)),
+            [self.certificate_pks[2]]
+        )
+
+
+@mock.patch('navoica_api.certificates.functions.default_storage.exists', return_value=True)
+@mock.patch('navoica_api.certificates.functions.convert_html', side_effect=lambda html, path: path)
+class SaveCertificatePdfTest(TestCase):
+    """
+    Test for reusing PDFs rendered from the same HTML
+    """
+
+    def setUp(self):
+        super(SaveCertificatePdfTest, self).setUp()
+        cache.clear()
+
+    def test_certificate_pdf_reuse(self, convert_html, _exists):
+        """
+        Test that the PDF of the same HTML is reused unless reuse is turned off or the template version changes
+        """
+        html = u'<html><body><p>Certificate</p><input name="csrfmiddlewaretoken" value="{}"></body></html>'
+        path = save_certificate_pdf(html.format('first'), 1)
+        self.assertEqual(convert_html.call_count, 1)
+
+        self.assertEqual(save_certificate_pdf(html.format('second'), 1), path)
+        self.assertEqual(convert_html.call_count, 1)
+
+        self.assertNotEqual(save_certificate_pdf(html.format('first'), 1, reuse=False), path)
+        self.assertEqual(convert_html.call_count, 2)
+
+        with mock.patch('navoica_api.certificates.functions.CERTIFICATES_TEMPLATE_VERSION', '2'):
+            save_certificate_pdf(html.format('first'), 1)
+        self.assertEqual(convert_html.call_count, 3)
+
+
+class MergeCertificatesTest(TestCase):
+    """
+    Test for merging PDFs of course certificates into a ZIP archive
+    """
+    DOWNLOAD_URL = 'http://www.example.com/certificate.pdf'
+
+    def setUp(self):
+        super(MergeCertificatesTest, self).setUp()
+        self.course = CourseOverviewFactory()
+        self.instructor = UserFactory()
+
+    @mock.patch('navoica_api.certificates.functions.get_session')
+    def test_merge_certificates_from_storage_and_http(self, get_session):
+        """
+        Test that the merged ZIP archive has PDFs read from the storage and downloaded from download_url
+        """
+        path = default_storage.save('certificates/merge-test.pdf', ContentFile(b'%PDF stored'))
+        self.addCleanup(default_storage.delete, path)
+        GeneratedCertificateFactory(
+            user=UserFactory(),
+            course_id=self.course.id,
+            status=CertificateStatuses.downloadable,
+            download_url=default_storage.url(path),
+            verify_uuid='stored',
+        )
+        GeneratedCertificateFactory(
+            user=UserFactory(),
+            course_id=self.course.id,
+            status=CertificateStatuses.downloadable,
+            download_url=self.DOWNLOAD_URL,
+            verify_uuid='downloaded',
+        )
+
+        response = mock.MagicMock(status_code=200)
+        response.iter_content.return_value = [b'%PDF ', b'downloaded']
+        get_session.return_value.get.return_value.__enter__.return_value = response
+
+        request = RequestFactory().post('/')
+        request.user = self.instructor
+        merge_certificates(request, self.course.id)
+
+        get_session.return_value.get.assert_called_once_with(self.DOWNLOAD_URL, timeout=mock.ANY, stream=True)
+        merge_history = CertificateGenerationMergeHistory.objects.get(course_id=self.course.id)
+        with merge_history.pdf.open('rb') as archive, zipfile.ZipFile(archive) as zf:
+            self.assertEqual(sorted(zf.namelist()), ['downloaded.pdf', 'stored.pdf'])
+            self.assertEqual(zf.read('stored.pdf'), b'%PDF stored')
+            self.assertEqual(zf.read('downloaded.pdf'), b'%PDF downloaded')
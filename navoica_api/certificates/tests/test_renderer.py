@@ -0,0 +1,64 @@
+"""
+Tests for the concurrency limit and circuit breaker of the PDF renderer.
+"""
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from navoica_api.certificates import renderer
+
+
+@mock.patch('navoica_api.certificates.renderer.RENDERER_MAX_IN_FLIGHT', 1)
+class RendererTest(TestCase):
+    """
+    Test for renderer slots and the circuit breaker
+    """
+
+    def setUp(self):
+        super(RendererTest, self).setUp()
+        cache.clear()
+
+    @mock.patch('navoica_api.certificates.renderer.RENDERER_MIN_CALLS', 4)
+    def test_renderer_circuit_breaker(self):
+        """
+        Test that the circuit opens on the failure ratio and is closed by a single probe after the pause
+        """
+        renderer.record_success()
+        renderer.record_success()
+        renderer.record_failure()
+        self.assertFalse(renderer.is_circuit_open())
+        renderer.record_failure()
+        self.assertTrue(renderer.is_circuit_open())
+        with self.assertRaises(renderer.RendererUnavailable):
+            with renderer.renderer_slot(timeout=0):
+                pass
+
+        # the pause is over
+        cache.delete(renderer.CIRCUIT_OPEN_CACHE_KEY)
+        self.assertTrue(renderer.is_circuit_half_open())
+        with renderer.renderer_slot(timeout=0):
+            with self.assertRaises(renderer.RendererUnavailable):
+                with renderer.renderer_slot(timeout=0):
+                    pass
+            renderer.record_failure()
+        self.assertTrue(renderer.is_circuit_open())
+
+        cache.delete(renderer.CIRCUIT_OPEN_CACHE_KEY)
+        with renderer.renderer_slot(timeout=0):
+            renderer.record_success()
+        self.assertFalse(renderer.is_circuit_open())
+        self.assertFalse(renderer.is_circuit_half_open())
+        self.assertEqual(renderer.get_renderer_status()['failures'], 0)
+
+    def test_renderer_slot_is_released_by_owner_only(self):
+        """
+        Test that an expired slot taken by another call is not released by the previous owner
+        """
+        with renderer.renderer_slot(timeout=0):
+            # the slot expired and another call took it
+            cache.set(renderer._slot_cache_key(0), 'other', None)
+        self.assertEqual(cache.get(renderer._slot_cache_key(0)), 'other')
+        with self.assertRaises(renderer.RendererUnavailable):
+            with renderer.renderer_slot(timeout=0):
+                pass
@@ -0,0 +1,133 @@
+"""
+Tests for scheduling of certificate PDF renders.
+"""
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from lms.djangoapps.certificates.models import CertificateStatuses
+from lms.djangoapps.certificates.tests.factories import GeneratedCertificateFactory
+from lms.djangoapps.courseware.tests.factories import UserFactory
+from opaque_keys.edx.keys import CourseKey
+
+from navoica_api.certificates.scheduling import is_pdf_update, schedule_certificate_render
+
+
+class CertificateRenderSignalTest(TestCase):
+    """
+    Test for the render scheduled when the certificate is saved
+    """
+
+    def setUp(self):
+        super(CertificateRenderSignalTest, self).setUp()
+        cache.clear()
+        self.course_key = CourseKey.from_string('course-v1:edX+DemoX+Demo_Course')
+
+        on_commit_patcher = mock.patch('navoica_api.certificates.signals.handlers.transaction.on_commit')
+        self.on_commit = on_commit_patcher.start()
+        self.addCleanup(on_commit_patcher.stop)
+        schedule_patcher = mock.patch('navoica_api.certificates.signals.handlers.schedule_certificate_render')
+        self.schedule = schedule_patcher.start()
+        self.addCleanup(schedule_patcher.stop)
+
+        self.certificate = GeneratedCertificateFactory(
+            user=UserFactory(),
+            course_id=self.course_key,
+            status=CertificateStatuses.downloadable,
+            download_url='',
+        )
+        self.on_commit.reset_mock()
+
+    def test_render_is_scheduled_after_commit(self):
+        """
+        Test that the render is scheduled only when the transaction is committed
+        """
+        self.certificate.save()
+        self.on_commit.assert_called_once()
+        self.schedule.assert_not_called()
+
+        schedule_render = self.on_commit.call_args[0][0]
+        schedule_render()
+        self.schedule.assert_called_once_with(self.certificate)
+
+    def test_updates_of_fields_not_rendered_in_pdf_are_skipped(self):
+        """
+        Test that saves of fields not rendered in the PDF don't schedule the render, by field name or attname
+        """
+        self.certificate.save(update_fields=['error_reason'])
+        self.on_commit.assert_not_called()
+
+        self.certificate.save(update_fields=['user_id'])
+        self.assertEqual(self.on_commit.call_count, 1)
+        self.certificate.save(update_fields=['user'])
+        self.assertEqual(self.on_commit.call_count, 2)
+        self.certificate.save(update_fields=['grade', 'error_reason'])
+        self.assertEqual(self.on_commit.call_count, 3)
+
+    def test_rendered_or_not_downloadable_certificates_are_skipped(self):
+        """
+        Test that certificates with download_url or not downloadable are not rendered
+        """
+        self.certificate.download_url = 'http://www.example.com/certificate.pdf'
+        self.certificate.save()
+        self.certificate.download_url = ''
+        self.certificate.status = CertificateStatuses.notpassing
+        self.certificate.save()
+        self.on_commit.assert_not_called()
+
+    def test_is_pdf_update(self):
+        """
+        Test that all fields are rendered without update_fields
+        """
+        self.assertTrue(is_pdf_update(None))
+        self.assertTrue(is_pdf_update(frozenset(['course_id'])))
+        self.assertFalse(is_pdf_update(frozenset(['modified_date'])))
+
+
+@mock.patch('navoica_api.certificates.scheduling.render_course_pdfs')
+@mock.patch('navoica_api.certificates.scheduling.render_pdf_cert_by_pk')
+class ScheduleCertificateRenderTest(TestCase):
+    """
+    Test for the render lock and bursts of renders
+    """
+
+    def setUp(self):
+        super(ScheduleCertificateRenderTest, self).setUp()
+        cache.clear()
+        self.course_key = CourseKey.from_string('course-v1:edX+DemoX+Demo_Course')
+        with mock.patch('navoica_api.certificates.signals.handlers.transaction.on_commit'):
+            self.certificates = [
+                GeneratedCertificateFactory(
+                    user=UserFactory(),
+                    course_id=self.course_key,
+                    status=CertificateStatuses.downloadable,
+                    download_url='',
+                    grade=0.8,
+                )
+                for _index in range(4)
+            ]
+
+    def test_render_is_locked_per_version(self, render_pdf_cert_by_pk, render_course_pdfs):
+        """
+        Test that the same version of the certificate is scheduled once and a changed one again
+        """
+        certificate = self.certificates[0]
+        self.assertTrue(schedule_certificate_render(certificate))
+        self.assertFalse(schedule_certificate_render(certificate))
+        render_pdf_cert_by_pk.delay.assert_called_once_with(certificate.pk)
+
+        certificate.grade = 0.9
+        self.assertTrue(schedule_certificate_render(certificate))
+        self.assertEqual(render_pdf_cert_by_pk.delay.call_count, 2)
+        render_course_pdfs.apply_async.assert_not_called()
+
+    @mock.patch('navoica_api.certificates.scheduling.RENDER_BURST_THRESHOLD', 2)
+    def test_burst_renders_course_in_batches(self, render_pdf_cert_by_pk, render_course_pdfs):
+        """
+        Test that certificates after the burst threshold are rendered by one course task
+        """
+        for certificate in self.certificates:
+            self.assertTrue(schedule_certificate_render(certificate))
+
+        self.assertEqual(render_pdf_cert_by_pk.delay.call_count, 2)
+        render_course_pdfs.apply_async.assert_called_once_with(args=[str(self.course_key)], countdown=mock.ANY)
@@ -0,0 +1,69 @@
+"""
+Tests for the re-render jobs of certificate PDFs.
+"""
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from lms.djangoapps.certificates.models import CertificateStatuses
+from lms.djangoapps.certificates.tests.factories import GeneratedCertificateFactory
+from lms.djangoapps.courseware.tests.factories import UserFactory
+from opaque_keys.edx.keys import CourseKey
+
+from navoica_api.certificates.tasks import rerender_course_certificates
+from navoica_api.models import CertificateRerenderJob
+
+
+class RerenderCourseCertificatesTest(TestCase):
+    """
+    Test for the re-render job of course certificates and its command
+    """
+
+    def setUp(self):
+        super(RerenderCourseCertificatesTest, self).setUp()
+        self.course_key = CourseKey.from_string('course-v1:edX+DemoX+Demo_Course')
+        self.certificates = [
+            GeneratedCertificateFactory(
+                user=UserFactory(),
+                course_id=self.course_key,
+                download_url='http://www.example.com/certificate.pdf',
+                status=CertificateStatuses.downloadable,
+            )
+            for _index in range(3)
+        ]
+
+    def test_rerender_job_counts_deferred_certificates_once(self):
+        """
+        Test that certificates rendered after a deferred one are counted only when their chunk is finished
+        """
+        first, second, third = self.certificates
+        render_results = [
+            ([first, third], [], [second.pk]),
+            ([second, third], [], []),
+        ]
+        with mock.patch('navoica_api.certificates.tasks.render_pdfs', side_effect=render_results) as render_pdfs:
+            call_command('rerender_course_certificates', str(self.course_key))
+
+        self.assertEqual(render_pdfs.call_count, 2)
+        job = CertificateRerenderJob.objects.get(course_id=self.course_key)
+        self.assertEqual(job.status, CertificateRerenderJob.FINISHED)
+        self.assertEqual(job.rendered, 3)
+        self.assertEqual(job.last_pk, third.pk)
+
+    def test_rerender_job_is_marked_failed_and_resumed(self):
+        """
+        Test that the job is marked as failed on unexpected error and can be resumed from its checkpoint
+        """
+        job = CertificateRerenderJob.objects.create(course_id=self.course_key)
+        with mock.patch('navoica_api.certificates.tasks.render_pdfs', side_effect=ValueError):
+            with self.assertRaises(ValueError):
+                rerender_course_certificates(job.id, 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, CertificateRerenderJob.FAILED)
+        self.assertEqual(job.last_pk, 0)
+
+        with mock.patch('navoica_api.certificates.tasks.render_pdfs', return_value=(self.certificates, [], [])):
+            call_command('rerender_course_certificates', str(self.course_key), '--resume')
+        job.refresh_from_db()
+        self.assertEqual(job.status, CertificateRerenderJob.FINISHED)
+        self.assertEqual(job.rendered, 3)
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from lms.djangoapps.certificates.models import GeneratedCertificate
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+
+from navoica_api.certificates.roster import ROSTER_BACKFILL_CHUNK_SIZE, backfill_course_roster
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized roster of certificates used by the certificates list'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_ids', nargs='*', metavar='course_id', help='Courses to rebuild')
+        parser.add_argument('--all', action='store_true', help='Rebuild all courses with certificates')
+        parser.add_argument('--batch-size', type=int, default=ROSTER_BACKFILL_CHUNK_SIZE,
+                            help='Number of certificates in batch')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            course_keys = GeneratedCertificate.objects.values_list('course_id', flat=True).distinct()
+        elif options['course_ids']:
+            try:
+                course_keys = [CourseKey.from_string(course_id) for course_id in options['course_ids']]
+            except InvalidKeyError as error:
+                raise CommandError('Invalid course id: {}'.format(error))
+        else:
+            raise CommandError('Pass course ids or --all')
+
+        for course_key in course_keys:
+            number_of_entries = backfill_course_roster(course_key, options['batch_size'])
+            self.stdout.write(self.style.SUCCESS('{}: {} certificates'.format(course_key, number_of_entries)))
+
+        self.stdout.write(self.style.SUCCESS('Successfully finished'))
@@ -0,0 +1,36 @@
+import json
+from time import time
+
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+from xmodule.modulestore.exceptions import ItemNotFoundError
+
+from navoica_api.progress.bulk import BULK_CHUNK_SIZE
+from navoica_api.progress.cache import get_course_structure_index
+from navoica_api.progress.statistics import course_progress_distribution
+
+
+class Command(BaseCommand):
+    help = 'Print histogram, quantiles and mean of course progress of enrolled learners'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_id', help='Course id')
+        parser.add_argument('--bins', type=int, default=10, help='Number of histogram bins')
+        parser.add_argument('--batch-size', type=int, default=BULK_CHUNK_SIZE, help='Number of learners in batch')
+
+    def handle(self, *args, **options):
+        if not 1 <= options['bins'] <= 100:
+            raise CommandError('Number of bins must be between 1 and 100.')
+        try:
+            course_key = CourseKey.from_string(options['course_id'])
+            structure_index = get_course_structure_index(course_key)
+        except (InvalidKeyError, ItemNotFoundError):
+            raise CommandError('Course {} does not exist'.format(options['course_id']))
+
+        start_time = time()
+        distribution = course_progress_distribution(
+            course_key, structure_index, bins=options['bins'], chunk_size=options['batch_size']
+        )
+        self.stdout.write(json.dumps(distribution, indent=4))
+        self.stdout.write(self.style.SUCCESS('Calculated in {:.1f}s'.format(time() - start_time)))
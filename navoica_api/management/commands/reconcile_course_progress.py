@@ -0,0 +1,42 @@
+from time import time
+
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+from openedx.core.djangoapps.content.course_overviews.models import CourseOverview
+from xmodule.modulestore.exceptions import ItemNotFoundError
+
+from navoica_api.progress.bulk import BULK_CHUNK_SIZE
+from navoica_api.progress.materialized import reconcile_course_progress
+
+
+class Command(BaseCommand):
+    help = 'Backfill and reconcile materialized course progress of enrolled learners'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_ids', nargs='*', metavar='course_id', help='Courses to reconcile')
+        parser.add_argument('--all', action='store_true', help='Reconcile all courses')
+        parser.add_argument('--batch-size', type=int, default=BULK_CHUNK_SIZE, help='Number of learners in batch')
+
+    def handle(self, *args, **options):
+        if options['all']:
+            course_keys = CourseOverview.objects.values_list('id', flat=True)
+        elif options['course_ids']:
+            try:
+                course_keys = [CourseKey.from_string(course_id) for course_id in options['course_ids']]
+            except InvalidKeyError as error:
+                raise CommandError('Invalid course id: {}'.format(error))
+        else:
+            raise CommandError('Pass course ids or --all')
+
+        for course_key in course_keys:
+            start_time = time()
+            try:
+                created, updated = reconcile_course_progress(course_key, options['batch_size'])
+            except ItemNotFoundError:
+                self.stdout.write(self.style.WARNING('{}: course does not exist'.format(course_key)))
+                continue
+            self.stdout.write(self.style.SUCCESS('{}: created {}, updated {} in {:.1f}s'.format(
+                course_key, created, updated, time() - start_time)))
+
+        self.stdout.write(self.style.SUCCESS('Successfully finished'))
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+from opaque_keys import InvalidKeyError
+from opaque_keys.edx.keys import CourseKey
+
+from navoica_api.certificates.functions import RENDER_BATCH_PARALLELISM
+from navoica_api.certificates.tasks import RENDER_BATCH_SIZE, rerender_course_certificates
+from navoica_api.models import CertificateRerenderJob
+
+
+class Command(BaseCommand):
+    help = 'Re-render PDFs of downloadable certificates of the course in chunks, e.g. after a template change'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_id', help='Course to re-render')
+        parser.add_argument('--chunk-size', type=int, default=RENDER_BATCH_SIZE,
+                            help='Number of certificates in chunk')
+        parser.add_argument('--parallelism', type=int, default=RENDER_BATCH_PARALLELISM,
+                            help='Number of concurrent conversions in chunk')
+        parser.add_argument('--rate', type=float, default=0,
+                            help='Maximum number of certificates per second, 0 for no limit')
+        parser.add_argument('--resume', action='store_true',
+                            help='Continue the last unfinished or failed job of the course from its checkpoint')
+        parser.add_argument('--status', action='store_true', help='Show the last job of the course')
+
+    def handle(self, *args, **options):
+        try:
+            course_key = CourseKey.from_string(options['course_id'])
+        except InvalidKeyError as error:
+            raise CommandError('Invalid course id: {}'.format(error))
+
+        if options['status']:
+            job = CertificateRerenderJob.objects.filter(course_id=course_key).order_by('-id').first()
+            if job is None:
+                raise CommandError('No jobs of course {}'.format(course_key))
+            self.stdout.write(self.style.SUCCESS('Job {}: {}, {} rendered, {} failed, {:.2f} certs/s'.format(
+                job.id, job.status, job.rendered, job.failed, job.throughput)))
+            return
+
+        if options['resume']:
+            job = CertificateRerenderJob.objects.filter(
+                course_id=course_key, status__in=[CertificateRerenderJob.RUNNING, CertificateRerenderJob.FAILED]
+            ).order_by('-id').first()
+            if job is None:
+                raise CommandError('No unfinished jobs of course {}'.format(course_key))
+            if job.status == CertificateRerenderJob.FAILED:
+                job.status = CertificateRerenderJob.RUNNING
+                job.save(update_fields=['status', 'modified'])
+        else:
+            job = CertificateRerenderJob.objects.create(
+                course_id=course_key,
+                chunk_size=options['chunk_size'],
+                parallelism=options['parallelism'],
+                rate=options['rate'],
+            )
+
+        rerender_course_certificates.delay(job.id, job.last_pk)
+        self.stdout.write(self.style.SUCCESS('Job {} scheduled from certificate {}'.format(job.id, job.last_pk)))
@@ -0,0 +1,39 @@
+# Generated by Django 2.2.17 on 2026-10-17 10:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+import opaque_keys.edx.django.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('navoica_api', '0004_careermodel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseProgressModel',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('course_id', opaque_keys.edx.django.models.CourseKeyField(db_index=True, max_length=255)),
+                ('completion_value', models.FloatField(default=0.0)),
+                ('structure_version', models.CharField(blank=True, max_length=255)),
+                ('unit_sums', models.TextField(default='[]')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='courseprogressmodel',
+            constraint=models.UniqueConstraint(fields=('user', 'course_id'), name='unique_user_course_progress'),
+        ),
+    ]
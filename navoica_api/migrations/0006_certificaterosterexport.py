@@ -0,0 +1,36 @@
+# Generated by Django 2.2.17 on 2026-10-17 11:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import model_utils.fields
+import opaque_keys.edx.django.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('instructor_task', '0003_alter_task_input_field'),
+        ('navoica_api', '0005_courseprogressmodel'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CertificateRosterExport',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('course_id', opaque_keys.edx.django.models.CourseKeyField(max_length=255)),
+                ('output_format', models.CharField(choices=[('csv', 'CSV'), ('ndjson', 'NDJSON'), ('xlsx', 'XLSX')], default='csv', max_length=10)),
+                ('file', models.FileField(upload_to='certificate_rosters/%Y/%m/%d/')),
+                ('generated_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('instructor_task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='instructor_task.InstructorTask')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 2.2.17 on 2026-10-17 12:00
+
+from django.db import migrations, models
+import django.utils.timezone
+import model_utils.fields
+import opaque_keys.edx.django.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('navoica_api', '0006_certificaterosterexport'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CertificateRosterCourse',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('course_id', opaque_keys.edx.django.models.CourseKeyField(max_length=255, unique=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='CertificateRosterEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('certificate_id', models.IntegerField(unique=True)),
+                ('course_id', opaque_keys.edx.django.models.CourseKeyField(max_length=255)),
+                ('user_id', models.IntegerField(db_index=True)),
+                ('username', models.CharField(max_length=150)),
+                ('email', models.CharField(max_length=254)),
+                ('profile_name', models.CharField(blank=True, max_length=255)),
+                ('username_search', models.CharField(max_length=150)),
+                ('email_search', models.CharField(max_length=254)),
+                ('profile_name_search', models.CharField(blank=True, max_length=255)),
+                ('created_date', models.DateTimeField()),
+                ('grade', models.CharField(blank=True, max_length=5)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='certificaterosterentry',
+            index=models.Index(fields=['course_id', 'created_date', 'id'], name='roster_course_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='certificaterosterentry',
+            index=models.Index(fields=['course_id', 'username_search'], name='roster_course_username_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='certificaterosterentry',
+            index=models.Index(fields=['course_id', 'email_search'], name='roster_course_email_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='certificaterosterentry',
+            index=models.Index(fields=['course_id', 'profile_name_search'], name='roster_course_name_idx'),
+        ),
+    ]
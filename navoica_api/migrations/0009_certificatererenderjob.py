@@ -0,0 +1,36 @@
+# Generated by Django 2.2.17 on 2026-10-17 12:00
+
+from django.db import migrations, models
+import django.utils.timezone
+import model_utils.fields
+import opaque_keys.edx.django.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('navoica_api', '0008_certificatepdfdigest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CertificateRerenderJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', model_utils.fields.AutoCreatedField(default=django.utils.timezone.now, editable=False, verbose_name='created')),
+                ('modified', model_utils.fields.AutoLastModifiedField(default=django.utils.timezone.now, editable=False, verbose_name='modified')),
+                ('course_id', opaque_keys.edx.django.models.CourseKeyField(db_index=True, max_length=255)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('finished', 'Finished')], default='running', max_length=10)),
+                ('chunk_size', models.PositiveIntegerField(default=50)),
+                ('parallelism', models.PositiveIntegerField(default=4)),
+                ('rate', models.FloatField(default=0, help_text='Maximum number of certificates per second, 0 for no limit')),
+                ('last_pk', models.IntegerField(default=0)),
+                ('rendered', models.PositiveIntegerField(default=0)),
+                ('failed', models.PositiveIntegerField(default=0)),
+                ('duration', models.FloatField(default=0, help_text='Seconds spent on rendering chunks')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
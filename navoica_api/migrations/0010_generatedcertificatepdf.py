@@ -0,0 +1,21 @@
+# Generated by Django 2.2.17 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('navoica_api', '0009_certificatererenderjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeneratedCertificatePdf',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('certificate_id', models.IntegerField(unique=True)),
+                ('path', models.CharField(max_length=255)),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.17 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('navoica_api', '0010_generatedcertificatepdf'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='certificatererenderjob',
+            name='status',
+            field=models.CharField(choices=[('running', 'Running'), ('finished', 'Finished'), ('failed', 'Failed')], default='running', max_length=10),
+        ),
+    ]
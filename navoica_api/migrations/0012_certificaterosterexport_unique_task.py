@@ -0,0 +1,34 @@
+# Generated by Django 2.2.17 on 2026-10-18 14:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def remove_duplicated_exports(apps, schema_editor):
+    """
+    Keep one export per instructor task, the one with the file or the first created.
+    """
+    CertificateRosterExport = apps.get_model('navoica_api', 'CertificateRosterExport')
+    kept_task_ids = set()
+    for roster_export in CertificateRosterExport.objects.order_by('instructor_task_id', '-file', 'id'):
+        if roster_export.instructor_task_id in kept_task_ids:
+            roster_export.delete()
+        else:
+            kept_task_ids.add(roster_export.instructor_task_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('instructor_task', '0003_alter_task_input_field'),
+        ('navoica_api', '0011_certificatererenderjob_failed_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicated_exports, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='certificaterosterexport',
+            name='instructor_task',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to='instructor_task.InstructorTask'),
+        ),
+    ]
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import json
 import uuid
 
 from django.contrib.auth.models import User
@@ -23,6 +24,117 @@ class CertificateGenerationMergeHistory(TimeStampedModel):
         return _("generating")
 
 
+class CertificateRosterExport(TimeStampedModel):
+    """
+    File with the roster of generated certificates of the course, written by the instructor task.
+    """
+    CSV = 'csv'
+    NDJSON = 'ndjson'
+    XLSX = 'xlsx'
+    OUTPUT_FORMAT_CHOICES = [
+        (CSV, 'CSV'),
+        (NDJSON, 'NDJSON'),
+        (XLSX, 'XLSX'),
+    ]
+
+    course_id = CourseKeyField(max_length=255)
+    generated_by = models.ForeignKey(User, null=True, blank=True, on_delete=models.CASCADE)
+    output_format = models.CharField(max_length=10, choices=OUTPUT_FORMAT_CHOICES, default=CSV)
+    file = models.FileField(upload_to="certificate_rosters/%Y/%m/%d/")
+    instructor_task = models.OneToOneField(InstructorTask, on_delete=models.CASCADE)
+
+    def get_task_name(self):
+        if self.file.name:
+            return _("generated")
+        return _("generating")
+
+
+class CertificateRosterEntry(models.Model):
+    """
+    Denormalized row of the roster of eligible generated certificates.
+
+    Copies user, profile and certificate fields used by the certificates list,
+    with lower-cased search columns, so the list does not join auth tables.
+    """
+    certificate_id = models.IntegerField(unique=True)
+    course_id = CourseKeyField(max_length=255)
+    user_id = models.IntegerField(db_index=True)
+    username = models.CharField(max_length=150)
+    email = models.CharField(max_length=254)
+    profile_name = models.CharField(max_length=255, blank=True)
+    username_search = models.CharField(max_length=150)
+    email_search = models.CharField(max_length=254)
+    profile_name_search = models.CharField(max_length=255, blank=True)
+    created_date = models.DateTimeField()
+    grade = models.CharField(max_length=5, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['course_id', 'created_date', 'id'], name='roster_course_created_idx'),
+            models.Index(fields=['course_id', 'username_search'], name='roster_course_username_idx'),
+            models.Index(fields=['course_id', 'email_search'], name='roster_course_email_idx'),
+            models.Index(fields=['course_id', 'profile_name_search'], name='roster_course_name_idx'),
+        ]
+
+
+class CertificateRosterCourse(TimeStampedModel):
+    """
+    Course which roster of certificates was fully populated and is kept in sync by signals.
+    """
+    course_id = CourseKeyField(max_length=255, unique=True)
+
+
+class CertificatePdfDigest(TimeStampedModel):
+    """
+    Storage path of the certificate PDF rendered from HTML with the given sha256 digest.
+    """
+    digest = models.CharField(max_length=64, unique=True)
+    path = models.CharField(max_length=255)
+
+
+class GeneratedCertificatePdf(models.Model):
+    """
+    Storage path of the PDF of the generated certificate, written next to its download_url.
+    """
+    certificate_id = models.IntegerField(unique=True)
+    path = models.CharField(max_length=255)
+
+
+class CertificateRerenderJob(TimeStampedModel):
+    """
+    Re-render of PDFs of downloadable certificates of the course, processed in chunks by pk.
+
+    last_pk is the checkpoint of the job, the job is resumed after the last finished chunk.
+    """
+    RUNNING = 'running'
+    FINISHED = 'finished'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (RUNNING, 'Running'),
+        (FINISHED, 'Finished'),
+        (FAILED, 'Failed'),
+    ]
+
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=RUNNING)
+    chunk_size = models.PositiveIntegerField(default=50)
+    parallelism = models.PositiveIntegerField(default=4)
+    rate = models.FloatField(default=0, help_text='Maximum number of certificates per second, 0 for no limit')
+    last_pk = models.IntegerField(default=0)
+    rendered = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    duration = models.FloatField(default=0, help_text='Seconds spent on rendering chunks')
+
+    @property
+    def throughput(self):
+        """
+        Number of rendered certificates per second.
+        """
+        if not self.duration:
+            return 0.0
+        return self.rendered / self.duration
+
+
 class CourseRunOpinionModel(models.Model):
     """
     Model for Course Opinion
@@ -79,3 +191,28 @@ class CareerModel(models.Model):
 
     def __str__(self):
         return self.job_title
+
+
+class CourseProgressModel(TimeStampedModel):
+    """
+    Materialized course progress of the learner.
+
+    unit_sums keeps JSON list of summed completions of each unit of the course
+    structure with the published version stored in structure_version.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    course_id = CourseKeyField(max_length=255, db_index=True)
+    completion_value = models.FloatField(default=0.0)
+    structure_version = models.CharField(max_length=255, blank=True)
+    unit_sums = models.TextField(default='[]')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'course_id'], name='unique_user_course_progress')
+        ]
+
+    def get_unit_sums(self):
+        return json.loads(self.unit_sums)
+
+    def set_unit_sums(self, sums):
+        self.unit_sums = json.dumps(list(sums))
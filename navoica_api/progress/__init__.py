@@ -0,0 +1,3 @@
+import logging
+
+PROGRESS_LOG = logging.getLogger('navoica_api.progress')
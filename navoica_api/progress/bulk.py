@@ -0,0 +1,79 @@
+"""
+Course progress calculated for many learners or many courses at once.
+"""
+from collections import defaultdict
+
+from completion.models import BlockCompletion
+from common.djangoapps.student.models import CourseEnrollment
+from django.conf import settings
+from xmodule.modulestore.exceptions import ItemNotFoundError
+
+from navoica_api.progress.cache import get_course_structure_index
+
+BULK_CHUNK_SIZE = getattr(settings, 'NAVOICA_PROGRESS_BULK_CHUNK_SIZE', 1000)
+
+
+def iter_enrolled_learners_chunks(course_key, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Yield lists of (user_id, username) of learners actively enrolled in the course.
+
+    Enrollments are fetched in chunks ordered by user id (keyset), so the memory
+    usage does not depend on the number of learners.
+    """
+    enrollments = CourseEnrollment.objects.filter(
+        course_id=course_key, is_active=True
+    ).order_by('user_id').values_list('user_id', 'user__username')
+
+    last_user_id = 0
+    while True:
+        chunk = list(enrollments.filter(user_id__gt=last_user_id)[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_user_id = chunk[-1][0]
+
+
+def iter_course_progress(course_key, structure_index, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Yield (user_id, username, completion_value) of every learner enrolled in the course.
+
+    Completions are loaded with one query per chunk of learners.
+    """
+    for learners in iter_enrolled_learners_chunks(course_key, chunk_size):
+        completions = BlockCompletion.objects.filter(
+            context_key=course_key,
+            user_id__in=[user_id for user_id, _username in learners],
+        ).values_list('user_id', 'block_key', 'completion')
+        sums_by_user = structure_index.unit_sums_by_user(completions.iterator())
+
+        for user_id, username in learners:
+            sums = sums_by_user.get(user_id)
+            completion_value = structure_index.progress_from_sums(sums) if sums is not None else float(0.0)
+            yield user_id, username, completion_value
+
+
+def get_learner_courses_progress(user_id, course_keys):
+    """
+    Return dict of course_key -> completion_value of the learner in given courses.
+
+    Completions of all courses are loaded with one query, structure indexes come from
+    the cache. Courses which do not exist are not included in the result.
+    """
+    structure_indexes = {}
+    for course_key in course_keys:
+        try:
+            structure_indexes[course_key] = get_course_structure_index(course_key)
+        except ItemNotFoundError:
+            continue
+
+    completions_by_course = defaultdict(list)
+    completions = BlockCompletion.objects.filter(
+        user_id=user_id, context_key__in=list(structure_indexes)
+    ).values_list('context_key', 'block_key', 'completion')
+    for context_key, block_key, completion in completions:
+        completions_by_course[context_key].append((block_key, completion))
+
+    return {
+        course_key: structure_index.completion_value(completions_by_course.get(course_key, ()))
+        for course_key, structure_index in structure_indexes.items()
+    }
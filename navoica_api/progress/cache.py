@@ -0,0 +1,146 @@
+"""
+Cache of the course structure indexes used by the progress calculation.
+
+Index is stored in the shared django cache under the key containing the published
+version of the course, so republishing of the course creates a new entry. The index
+is built without any user and is shared by all learners: staff only blocks and blocks
+restricted to groups (cohorts, content groups) are left out, so they never count in the
+progress of learners who can't see them. Recently used indexes are also kept in the
+process memory (LRU) in front of the shared cache.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from six import text_type
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.exceptions import ItemNotFoundError
+
+from navoica_api.progress import PROGRESS_LOG
+from navoica_api.progress.structure import CourseStructureIndex
+
+STRUCTURE_CACHE_TIMEOUT = getattr(settings, 'NAVOICA_PROGRESS_STRUCTURE_CACHE_TIMEOUT', 60 * 60 * 24 * 7)
+STRUCTURE_LRU_SIZE = getattr(settings, 'NAVOICA_PROGRESS_STRUCTURE_LRU_SIZE', 128)
+
+_local_indexes = OrderedDict()
+_local_indexes_lock = threading.Lock()
+
+
+def _version_cache_key(course_key):
+    return u"navoica_api.progress.version.{}".format(text_type(course_key))
+
+
+def _index_cache_key(course_key, version):
+    return u"navoica_api.progress.structure.{}.{}".format(text_type(course_key), version)
+
+
+def get_published_version(course_key):
+    """
+    Return published version of the course.
+
+    Version is read from the modulestore only once after each publish of the course,
+    later it is served from the shared cache.
+    """
+    version_key = _version_cache_key(course_key)
+    version = cache.get(version_key)
+    if version is None:
+        course = modulestore().get_course(course_key, depth=0)
+        if course is None:
+            raise ItemNotFoundError(course_key)
+        version = course.course_version or course.subtree_edited_on or 'unversioned'
+        version = text_type(version).replace(' ', '_')
+        cache.set(version_key, version, None)
+    return version
+
+
+def _get_local(key):
+    with _local_indexes_lock:
+        structure_index = _local_indexes.get(key)
+        if structure_index is not None:
+            _local_indexes.move_to_end(key)
+        return structure_index
+
+
+def _set_local(key, structure_index):
+    with _local_indexes_lock:
+        _local_indexes[key] = structure_index
+        _local_indexes.move_to_end(key)
+        while len(_local_indexes) > STRUCTURE_LRU_SIZE:
+            _local_indexes.popitem(last=False)
+
+
+def is_hidden_from_learners(xblock):
+    """
+    Return True if the block is visible only to staff or only to some groups of learners.
+    """
+    if xblock.visible_to_staff_only:
+        return True
+    group_access = getattr(xblock, 'group_access', None) or {}
+    return any(group_ids for group_ids in group_access.values())
+
+
+def build_course_structure_index(course_key, version=None):
+    """
+    Build structure index of the course from the course blocks visible to all learners.
+
+    Blocks are read from the modulestore without any user, staff only and group
+    restricted blocks are skipped together with their children.
+    """
+    block_xblocks_types_filter = settings.BLOCK_XBLOCKS_TYPES_FILTER
+    block_types_filter = frozenset(settings.BLOCK_NAVIGATION_TYPES_FILTER + block_xblocks_types_filter)
+
+    store = modulestore()
+    with store.bulk_operations(course_key):
+        course = store.get_course(course_key, depth=None)
+        if course is None:
+            raise ItemNotFoundError(course_key)
+
+        blocks = {}
+        stack = [course]
+        while stack:
+            xblock = stack.pop()
+            children = [
+                child for child in xblock.get_children()
+                if child.category in block_types_filter and not is_hidden_from_learners(child)
+            ] if xblock.has_children else []
+            blocks[text_type(xblock.location)] = {
+                'type': xblock.category,
+                'children': [text_type(child.location) for child in children],
+            }
+            stack.extend(children)
+
+    return CourseStructureIndex.from_blocks(
+        course_key, {'root': text_type(course.location), 'blocks': blocks}, block_xblocks_types_filter, version
+    )
+
+
+def get_course_structure_index(course_key):
+    """
+    Return structure index of the published version of the course.
+
+    Raises:
+        ItemNotFoundError: if the course does not exist.
+    """
+    version = get_published_version(course_key)
+
+    structure_index = _get_local((course_key, version))
+    if structure_index is None:
+        key = _index_cache_key(course_key, version)
+        structure_index = cache.get(key)
+        if structure_index is None:
+            PROGRESS_LOG.info("Progress: building structure index for course {}".format(course_key))
+            structure_index = build_course_structure_index(course_key, version)
+            cache.set(key, structure_index, STRUCTURE_CACHE_TIMEOUT)
+        _set_local((course_key, version), structure_index)
+    return structure_index
+
+
+def invalidate_course_structure_index(course_key):
+    """
+    Forget the published version of the course, the next request builds a new index.
+    """
+    cache.delete(_version_cache_key(course_key))
+    with _local_indexes_lock:
+        for key in [key for key in _local_indexes if key[0] == course_key]:
+            del _local_indexes[key]
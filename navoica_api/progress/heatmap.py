@@ -0,0 +1,61 @@
+"""
+Share of enrolled learners who completed units and leaf xblocks of the course.
+"""
+from completion.models import BlockCompletion
+from common.djangoapps.student.models import CourseEnrollment
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from six import text_type
+
+HEATMAP_CACHE_TIMEOUT = getattr(settings, 'NAVOICA_PROGRESS_HEATMAP_CACHE_TIMEOUT', 60 * 5)
+
+
+def _heatmap_cache_key(course_key, version):
+    return u"navoica_api.progress.heatmap.{}.{}".format(text_type(course_key), version)
+
+
+def _share(count, learners):
+    return round(count / learners, 3) if learners else 0.0
+
+
+def course_completion_heatmap(course_key, structure_index):
+    """
+    Return share of enrolled learners who completed each leaf xblock and unit of the course.
+
+    Actively enrolled learners who completed each block are counted with one grouped
+    query over BlockCompletion. Share of a unit is the mean of shares of its leaf xblocks.
+    The result is cached for HEATMAP_CACHE_TIMEOUT seconds.
+    """
+    key = _heatmap_cache_key(course_key, structure_index.version)
+    heatmap = cache.get(key)
+    if heatmap is not None:
+        return heatmap
+
+    enrollments = CourseEnrollment.objects.filter(course_id=course_key, is_active=True)
+    learners = enrollments.count()
+    completed_by_leaf = [0] * len(structure_index.leaf_ids)
+    completed_blocks = BlockCompletion.objects.filter(
+        context_key=course_key, completion__gte=1.0, user_id__in=enrollments.values('user_id')
+    ).order_by().values('block_key').annotate(learners=Count('id')).values_list('block_key', 'learners')
+    for block_key, completed in completed_blocks:
+        position = structure_index.leaf_position(block_key)
+        if position is not None:
+            completed_by_leaf[position] += completed
+
+    units = [{"id": unit_id, "completion_share": 0.0, "blocks": []} for unit_id in structure_index.unit_ids]
+    for leaf_id, unit_index, completed in zip(structure_index.leaf_ids, structure_index.leaf_units, completed_by_leaf):
+        units[unit_index]["blocks"].append({
+            "id": leaf_id,
+            "completed": completed,
+            "completion_share": _share(completed, learners),
+        })
+    for unit in units:
+        if unit["blocks"]:
+            unit["completion_share"] = round(
+                sum(block["completion_share"] for block in unit["blocks"]) / len(unit["blocks"]), 3
+            )
+
+    heatmap = {"learners": learners, "units": units}
+    cache.set(key, heatmap, HEATMAP_CACHE_TIMEOUT)
+    return heatmap
@@ -0,0 +1,145 @@
+"""
+Materialized course progress of learners (CourseProgressModel).
+
+Rows are updated unit by unit when the learner's completion changes and are fully
+recomputed when they were calculated for another published version of the course.
+"""
+import json
+
+from completion.models import BlockCompletion
+from django.db import transaction
+from opaque_keys.edx.keys import UsageKey
+
+from navoica_api.models import CourseProgressModel
+from navoica_api.progress.bulk import BULK_CHUNK_SIZE, iter_enrolled_learners_chunks
+from navoica_api.progress.cache import get_course_structure_index
+
+
+def _is_current(course_progress, structure_index):
+    return (course_progress.structure_version == structure_index.version and
+            len(course_progress.get_unit_sums()) == len(structure_index.unit_ids))
+
+
+def recompute_course_progress(user_id, course_key, structure_index):
+    """
+    Calculate progress of the learner from all completions and store it.
+    """
+    completions = BlockCompletion.objects.filter(
+        user_id=user_id, context_key=course_key
+    ).values_list('block_key', 'completion')
+    sums = structure_index.unit_sums(completions)
+
+    course_progress, _created = CourseProgressModel.objects.update_or_create(
+        user_id=user_id, course_id=course_key,
+        defaults={
+            'completion_value': structure_index.progress_from_sums(sums),
+            'structure_version': structure_index.version or '',
+            'unit_sums': json.dumps(list(sums)),
+        }
+    )
+    return course_progress
+
+
+def get_course_progress_model(user_id, course_key):
+    """
+    Return stored progress of the learner, recomputed only when the row is outdated.
+
+    Raises:
+        ItemNotFoundError: if the course does not exist.
+    """
+    structure_index = get_course_structure_index(course_key)
+    course_progress = CourseProgressModel.objects.filter(user_id=user_id, course_id=course_key).first()
+    if course_progress is None or not _is_current(course_progress, structure_index):
+        course_progress = recompute_course_progress(user_id, course_key, structure_index)
+    return course_progress
+
+
+def get_course_progress(user_id, course_key):
+    """
+    Return completion value of the learner.
+
+    Raises:
+        ItemNotFoundError: if the course does not exist.
+    """
+    return get_course_progress_model(user_id, course_key).completion_value
+
+
+def update_unit_progress(user_id, course_key, block_key):
+    """
+    Update stored progress of the learner after completion of the block has changed.
+
+    Only completions of the unit containing the block are read again.
+    """
+    structure_index = get_course_structure_index(course_key)
+    unit_index = structure_index.unit_of_block(block_key)
+    if unit_index is None:
+        return None
+
+    with transaction.atomic():
+        course_progress = CourseProgressModel.objects.select_for_update().filter(
+            user_id=user_id, course_id=course_key
+        ).first()
+        if course_progress is None or not _is_current(course_progress, structure_index):
+            return recompute_course_progress(user_id, course_key, structure_index)
+
+        unit_completions = BlockCompletion.objects.filter(
+            user_id=user_id,
+            context_key=course_key,
+            block_key__in=[UsageKey.from_string(leaf_id) for leaf_id in structure_index.unit_leaf_ids(unit_index)],
+        ).values_list('completion', flat=True)
+
+        sums = course_progress.get_unit_sums()
+        sums[unit_index] = sum(unit_completions)
+        course_progress.set_unit_sums(sums)
+        course_progress.completion_value = structure_index.progress_from_sums(sums)
+        course_progress.save(update_fields=['unit_sums', 'completion_value', 'modified'])
+    return course_progress
+
+
+def reconcile_course_progress(course_key, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Create or fix stored progress of all learners enrolled in the course.
+
+    Learners are processed in chunks, each chunk costs one query for completions,
+    one for stored rows and bulk writes of missing or changed rows.
+
+    Return:
+        tuple of numbers of created and updated rows.
+    """
+    structure_index = get_course_structure_index(course_key)
+    created = updated = 0
+
+    for learners in iter_enrolled_learners_chunks(course_key, chunk_size):
+        user_ids = [user_id for user_id, _username in learners]
+        completions = BlockCompletion.objects.filter(
+            context_key=course_key, user_id__in=user_ids
+        ).values_list('user_id', 'block_key', 'completion')
+        sums_by_user = structure_index.unit_sums_by_user(completions.iterator())
+        stored = {
+            course_progress.user_id: course_progress
+            for course_progress in CourseProgressModel.objects.filter(course_id=course_key, user_id__in=user_ids)
+        }
+
+        to_create, to_update = [], []
+        for user_id in user_ids:
+            sums = sums_by_user.get(user_id) or [0.0] * len(structure_index.unit_ids)
+            course_progress = stored.get(user_id) or CourseProgressModel(user_id=user_id, course_id=course_key)
+            completion_value = structure_index.progress_from_sums(sums)
+            unit_sums = list(sums)
+            if (course_progress.pk and course_progress.completion_value == completion_value and
+                    course_progress.structure_version == structure_index.version and
+                    course_progress.get_unit_sums() == unit_sums):
+                continue
+            course_progress.completion_value = completion_value
+            course_progress.structure_version = structure_index.version or ''
+            course_progress.set_unit_sums(unit_sums)
+            (to_update if course_progress.pk else to_create).append(course_progress)
+
+        CourseProgressModel.objects.bulk_create(to_create, batch_size=chunk_size, ignore_conflicts=True)
+        CourseProgressModel.objects.bulk_update(
+            to_update, ['completion_value', 'structure_version', 'unit_sums'], batch_size=chunk_size
+        )
+        created += len(to_create)
+        updated += len(to_update)
+
+    return created, updated
@@ -0,0 +1,50 @@
+from completion.models import BlockCompletion
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from opaque_keys.edx.keys import CourseKey
+from six import text_type
+from xmodule.modulestore.django import SignalHandler
+
+from navoica_api.models import CourseProgressModel
+from navoica_api.progress import PROGRESS_LOG
+from navoica_api.progress.cache import invalidate_course_structure_index
+from navoica_api.progress.tasks import update_learner_unit_progress
+
+
+@receiver(SignalHandler.course_published, dispatch_uid="navoica_api_progress_course_published")
+def invalidate_structure_on_publish(sender, course_key, **kwargs):
+    PROGRESS_LOG.info("Course Published Signal: invalidating structure index for course {}".format(course_key))
+    invalidate_course_structure_index(course_key)
+
+
+@receiver(SignalHandler.course_deleted, dispatch_uid="navoica_api_progress_course_deleted")
+def invalidate_structure_on_delete(sender, course_key, **kwargs):
+    invalidate_course_structure_index(course_key)
+
+
+@receiver(post_save, sender=BlockCompletion, dispatch_uid="navoica_api_progress_block_completion_saved")
+def update_progress_on_completion(sender, instance, **kwargs):
+    """
+    Update stored progress in a task after the completion is committed, never failing the completion save.
+    """
+    if not isinstance(instance.context_key, CourseKey):
+        return
+
+    def schedule_update():
+        try:
+            update_learner_unit_progress.delay(
+                instance.user_id, text_type(instance.context_key), text_type(instance.block_key)
+            )
+        except Exception:  # pylint: disable=broad-except
+            PROGRESS_LOG.exception("Completion Signal: scheduling progress update of user {} failed".format(
+                instance.user_id))
+
+    transaction.on_commit(schedule_update)
+
+
+@receiver(post_delete, sender=BlockCompletion, dispatch_uid="navoica_api_progress_block_completion_deleted")
+def reset_progress_on_completion_delete(sender, instance, **kwargs):
+    CourseProgressModel.objects.filter(user_id=instance.user_id, course_id=instance.context_key).update(
+        structure_version=''
+    )
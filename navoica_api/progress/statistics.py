@@ -0,0 +1,119 @@
+"""
+Distribution of course progress of all learners enrolled in the course.
+"""
+import numpy as np
+from completion.models import BlockCompletion
+from django.db.models import CharField
+from django.db.models.functions import Cast
+
+from navoica_api.progress.bulk import BULK_CHUNK_SIZE, iter_enrolled_learners_chunks
+
+DISTRIBUTION_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+
+class LeafLookup(object):
+    """
+    Sorted leaf xblocks usage ids of the course for vectorized block id -> leaf position lookups.
+    """
+
+    def __init__(self, structure_index):
+        leaf_ids = np.asarray(structure_index.leaf_ids, dtype=str)
+        self.order = np.argsort(leaf_ids)
+        self.sorted_leaf_ids = leaf_ids[self.order]
+        self.leaf_units = np.asarray(structure_index.leaf_units, dtype=np.int64)
+
+    def positions(self, block_ids):
+        """
+        Return numpy array of leaf positions of the block ids, -1 for blocks which are not counted.
+        """
+        if not self.sorted_leaf_ids.size:
+            return np.full(len(block_ids), -1, dtype=np.int64)
+        unique_ids, inverse = np.unique(np.asarray(block_ids, dtype=str), return_inverse=True)
+        found = np.minimum(np.searchsorted(self.sorted_leaf_ids, unique_ids), self.sorted_leaf_ids.size - 1)
+        unique_positions = np.where(self.sorted_leaf_ids[found] == unique_ids, self.order[found], -1)
+        return unique_positions[inverse]
+
+
+def chunk_progress_values(structure_index, user_ids, completions, leaf_lookup=None):
+    """
+    Calculate course progress of a chunk of learners with array operations.
+
+    Args:
+        structure_index: CourseStructureIndex of the course.
+        user_ids: sorted list of learners' ids in the chunk.
+        completions: iterable of (user_id, block usage id string, completion) rows of the learners.
+        leaf_lookup: LeafLookup of the course, built once per course.
+    Return:
+        numpy array of completion values in order of user_ids.
+    """
+    number_of_units = len(structure_index.unit_ids)
+    unit_sizes = np.array(structure_index.unit_sizes, dtype=np.float64)
+    counted_units = unit_sizes > 0
+    completions = list(completions)
+    if not counted_units.any() or not completions:
+        return np.zeros(len(user_ids))
+    if leaf_lookup is None:
+        leaf_lookup = LeafLookup(structure_index)
+
+    rows_users, rows_blocks, rows_completions = zip(*completions)
+    users = np.searchsorted(np.asarray(user_ids, dtype=np.int64), np.asarray(rows_users, dtype=np.int64))
+    leaves = leaf_lookup.positions(rows_blocks)
+    counted = leaves >= 0
+
+    cells = users[counted] * number_of_units + leaf_lookup.leaf_units[leaves[counted]]
+    sums = np.bincount(
+        cells, weights=np.asarray(rows_completions, dtype=np.float64)[counted],
+        minlength=len(user_ids) * number_of_units
+    ).reshape(len(user_ids), number_of_units)
+
+    unit_ratios = sums[:, counted_units] / unit_sizes[counted_units]
+    return np.round(unit_ratios.mean(axis=1), 3)
+
+
+def course_progress_values(course_key, structure_index, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Return numpy array of completion values of all learners enrolled in the course.
+
+    Block keys are read as plain strings, so rows are not parsed into usage keys.
+    """
+    leaf_lookup = LeafLookup(structure_index)
+    values = []
+    for learners in iter_enrolled_learners_chunks(course_key, chunk_size):
+        user_ids = [user_id for user_id, _username in learners]
+        completions = BlockCompletion.objects.filter(
+            context_key=course_key, user_id__in=user_ids
+        ).annotate(
+            block_id=Cast('block_key', output_field=CharField())
+        ).values_list('user_id', 'block_id', 'completion')
+        values.append(chunk_progress_values(structure_index, user_ids, completions.iterator(), leaf_lookup))
+    if not values:
+        return np.zeros(0)
+    return np.concatenate(values)
+
+
+def course_progress_distribution(course_key, structure_index, bins=10, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Return histogram, quantiles and mean of course progress of enrolled learners.
+    """
+    values = course_progress_values(course_key, structure_index, chunk_size)
+    counts, edges = np.histogram(values, bins=bins, range=(0.0, 1.0))
+
+    if values.size:
+        mean = round(float(values.mean()), 3)
+        quantiles = np.quantile(values, DISTRIBUTION_QUANTILES)
+    else:
+        mean = None
+        quantiles = [None] * len(DISTRIBUTION_QUANTILES)
+
+    return {
+        "learners": int(values.size),
+        "mean": mean,
+        "quantiles": {
+            str(quantile): None if value is None else round(float(value), 3)
+            for quantile, value in zip(DISTRIBUTION_QUANTILES, quantiles)
+        },
+        "histogram": {
+            "bins": [round(float(edge), 3) for edge in edges],
+            "counts": [int(count) for count in counts],
+        },
+    }
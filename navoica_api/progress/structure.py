@@ -0,0 +1,176 @@
+"""
+Flattened course structure used to calculate learners' course progress.
+"""
+from array import array
+
+from django.conf import settings
+
+UNIT_BLOCK_TYPE = 'vertical'
+
+
+class CourseStructureIndex(object):
+    """
+    Compact unit -> leaf xblock mapping of a course.
+
+    Units (verticals) and the leaf xblocks counted by the progress
+    (``BLOCK_XBLOCKS_TYPES_FILTER``) are stored in flat arrays, so the progress
+    of a learner is a single pass over the learner's completions, without walking the tree.
+
+    Attributes:
+        course_key: CourseKey of the indexed course.
+        unit_ids: tuple of units usage ids in course order.
+        unit_sizes: array with number of leaf xblocks of each unit.
+        leaf_ids: tuple of leaf xblocks usage ids in course order.
+        leaf_units: array with index of the unit of each leaf xblock.
+        version: published version of the course the index was built from.
+    """
+
+    def __init__(self, course_key, unit_ids, unit_sizes, leaf_ids, leaf_units, version=None):
+        self.course_key = course_key
+        self.version = version
+        self.unit_ids = tuple(unit_ids)
+        self.unit_sizes = array('l', unit_sizes)
+        self.leaf_ids = tuple(leaf_ids)
+        self.leaf_units = array('l', leaf_units)
+        self._leaf_positions = {leaf_id: position for position, leaf_id in enumerate(self.leaf_ids)}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_leaf_positions']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._leaf_positions = {leaf_id: position for position, leaf_id in enumerate(self.leaf_ids)}
+
+    @classmethod
+    def from_blocks(cls, course_key, blocks, xblocks_types_filter=None, version=None):
+        """
+        Build the index from the dict with 'root' and 'blocks' (block id -> 'type' and 'children').
+
+        The tree is walked iteratively in course order. Leaf xblock belongs to the
+        closest vertical above it, leaves outside of any vertical are ignored and
+        a block reachable from many parents is counted only once.
+        """
+        if xblocks_types_filter is None:
+            xblocks_types_filter = settings.BLOCK_XBLOCKS_TYPES_FILTER
+        xblocks_types_filter = frozenset(xblocks_types_filter)
+
+        all_blocks = blocks['blocks']
+        unit_ids, unit_sizes, leaf_ids, leaf_units = [], [], [], []
+        seen_leaves = set()
+
+        # stack of (block_id, index of the closest unit above the block)
+        stack = [(blocks['root'], -1)]
+        while stack:
+            block_id, unit_index = stack.pop()
+            block = all_blocks.get(block_id)
+            if block is None:
+                continue
+            block_type = block.get('type', None)
+            child_ids = block.get('children', [])
+
+            if block_type == UNIT_BLOCK_TYPE:
+                unit_ids.append(block_id)
+                unit_sizes.append(0)
+                unit_index = len(unit_ids) - 1
+
+            if not child_ids and block_type in xblocks_types_filter:
+                if unit_index >= 0 and block_id not in seen_leaves:
+                    seen_leaves.add(block_id)
+                    leaf_ids.append(block_id)
+                    leaf_units.append(unit_index)
+                    unit_sizes[unit_index] += 1
+                continue
+
+            stack.extend((child_id, unit_index) for child_id in reversed(child_ids))
+
+        return cls(course_key, unit_ids, unit_sizes, leaf_ids, leaf_units, version)
+
+    def leaf_position(self, block_key):
+        """
+        Return position of the leaf xblock in ``leaf_ids`` or None if the block is not counted.
+        """
+        if block_key.context_key.run is None:
+            block_key = block_key.map_into_course(self.course_key)
+        return self._leaf_positions.get(str(block_key))
+
+    def unit_of_block(self, block_key):
+        """
+        Return index of the unit of the leaf xblock or None if the block is not counted.
+        """
+        position = self.leaf_position(block_key)
+        if position is None:
+            return None
+        return self.leaf_units[position]
+
+    def unit_leaf_ids(self, unit_index):
+        """
+        Return usage ids of leaf xblocks of the unit.
+        """
+        return [leaf_id for leaf_id, leaf_unit in zip(self.leaf_ids, self.leaf_units) if leaf_unit == unit_index]
+
+    def unit_sums(self, completions):
+        """
+        Sum completions of each unit.
+
+        Args:
+            completions: iterable of (block_key, completion) pairs, e.g.
+                ``BlockCompletion`` rows from ``values_list('block_key', 'completion')``.
+        Return:
+            array of summed completions, one value per unit.
+        """
+        sums = array('d', bytes(8 * len(self.unit_ids)))
+        leaf_units = self.leaf_units
+        for block_key, completion in completions:
+            position = self.leaf_position(block_key)
+            if position is not None:
+                sums[leaf_units[position]] += completion
+        return sums
+
+    def unit_sums_by_user(self, completions):
+        """
+        Sum completions of each unit for many learners at once.
+
+        Args:
+            completions: iterable of (user_id, block_key, completion) rows.
+        Return:
+            dict of user_id -> array of summed completions of units.
+        """
+        empty_sums = bytes(8 * len(self.unit_ids))
+        sums_by_user = {}
+        leaf_units = self.leaf_units
+        for user_id, block_key, completion in completions:
+            position = self.leaf_position(block_key)
+            if position is None:
+                continue
+            sums = sums_by_user.get(user_id)
+            if sums is None:
+                sums = sums_by_user[user_id] = array('d', empty_sums)
+            sums[leaf_units[position]] += completion
+        return sums_by_user
+
+    def progress_from_sums(self, sums):
+        """
+        Calculate course progress from summed completions of units.
+
+        Each unit with leaf xblocks has the same weight, units without them are skipped.
+        """
+        number_of_units = 0
+        cumulative_sum = 0.0
+        for unit_sum, unit_size in zip(sums, self.unit_sizes):
+            if unit_size:
+                number_of_units += 1
+                cumulative_sum += unit_sum / unit_size
+        if number_of_units == 0:
+            return float(0.0)
+        return round(cumulative_sum / number_of_units, 3)
+
+    def completion_value(self, completions):
+        """
+        Return a float between 0 and 1 of course completion for one learner.
+
+        Args:
+            completions: iterable of (block_key, completion) pairs of the learner.
+        """
+        return self.progress_from_sums(self.unit_sums(completions))
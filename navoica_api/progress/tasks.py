@@ -0,0 +1,21 @@
+from celery import shared_task
+from opaque_keys.edx.keys import CourseKey, UsageKey
+from xmodule.modulestore.exceptions import ItemNotFoundError
+
+from navoica_api.progress import PROGRESS_LOG
+from navoica_api.progress.materialized import update_unit_progress
+
+
+@shared_task
+def update_learner_unit_progress(user_id, course_id, block_id):
+    """
+    Update stored progress of the learner in the unit of the completed block.
+    """
+    course_key = CourseKey.from_string(course_id)
+    try:
+        update_unit_progress(user_id, course_key, UsageKey.from_string(block_id))
+    except ItemNotFoundError:
+        PROGRESS_LOG.info("Completion Signal: course {} does not exist".format(course_key))
+    except Exception:  # pylint: disable=broad-except
+        PROGRESS_LOG.exception("Completion Signal: updating progress of user {} in course {} failed".format(
+            user_id, course_key))
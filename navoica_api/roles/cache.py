@@ -0,0 +1,57 @@
+"""
+Cache of users' course roles used by the navoica permission classes.
+
+All course roles of the user are fetched with one query, memoized for the request
+and kept for a short time in the shared django cache. Changes of CourseAccessRole
+drop the shared cache entry of the user.
+"""
+from common.djangoapps.student.models import CourseAccessRole
+from django.conf import settings
+from django.core.cache import cache
+from edx_django_utils.cache import RequestCache
+from six import text_type
+
+COURSE_ROLES_CACHE_TIMEOUT = getattr(settings, 'NAVOICA_COURSE_ROLES_CACHE_TIMEOUT', 60 * 5)
+COURSE_ROLES_REQUEST_CACHE_NAMESPACE = 'navoica_api.roles'
+
+
+def _roles_cache_key(user_id):
+    return u"navoica_api.roles.{}".format(user_id)
+
+
+def get_user_course_roles(user):
+    """
+    Return frozenset of (course_id, role) pairs of the user.
+    """
+    if not (user.is_authenticated and user.is_active):
+        return frozenset()
+
+    request_cache = RequestCache(COURSE_ROLES_REQUEST_CACHE_NAMESPACE)
+    cached_response = request_cache.get_cached_response(user.id)
+    if cached_response.is_found:
+        return cached_response.value
+
+    key = _roles_cache_key(user.id)
+    roles = cache.get(key)
+    if roles is None:
+        roles = frozenset(
+            (text_type(course_id), role)
+            for course_id, role in CourseAccessRole.objects.filter(user_id=user.id).values_list('course_id', 'role')
+        )
+        cache.set(key, roles, COURSE_ROLES_CACHE_TIMEOUT)
+    request_cache.set(user.id, roles)
+    return roles
+
+
+def has_course_role(user, course_key, *roles):
+    """
+    Check if the user has any of the roles in the course.
+    """
+    user_roles = get_user_course_roles(user)
+    course_id = text_type(course_key)
+    return any((course_id, role) in user_roles for role in roles)
+
+
+def invalidate_user_course_roles(user_id):
+    cache.delete(_roles_cache_key(user_id))
+    RequestCache(COURSE_ROLES_REQUEST_CACHE_NAMESPACE).delete(user_id)
@@ -0,0 +1,11 @@
+from common.djangoapps.student.models import CourseAccessRole
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from navoica_api.roles.cache import invalidate_user_course_roles
+
+
+@receiver(post_save, sender=CourseAccessRole, dispatch_uid="navoica_api_course_access_role_saved")
+@receiver(post_delete, sender=CourseAccessRole, dispatch_uid="navoica_api_course_access_role_deleted")
+def invalidate_roles(sender, instance, **kwargs):
+    invalidate_user_course_roles(instance.user_id)